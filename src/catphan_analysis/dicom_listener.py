@@ -4,14 +4,62 @@ DICOM Listener and Processor
 Handles automated DICOM file reception and triggers analysis.
 """
 
+import json
 import os
+import re
+import threading
 import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 import pydicom
 from pathlib import Path
 from datetime import datetime
 from typing import Callable
 
+from pydicom.tag import Tag
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+# The only tags the grouping pass needs: StationName and PatientID.
+_ID_TAGS = [Tag(0x0008, 0x1010), Tag(0x0010, 0x0020)]
+
+# Characters stripped from identifiers before they are used in directory names.
+_ID_SANITIZE_RE = re.compile(r'[^A-Za-z0-9_ ]')
+
+# Identifier keywords that mark a study as QA rather than patient data.
+_QA_KEYWORDS = ('mlc', 'iso', 'prof', 'cat')
+
+
+class _NewFileEventHandler(FileSystemEventHandler):
+    """
+    Watchdog handler that wakes the listener when files arrive.
+
+    The handler does not process files itself; it only signals the listener
+    loop so batching and quiescence logic stay in one place.
+    """
+
+    def __init__(self, wake_event):
+        # `wake_event` is the threading.Event the listener loop waits on.
+        self.wake_event = wake_event
+
+    def on_created(self, event):
+        # Any newly created file should wake the listener immediately.
+        if not event.is_directory:
+            self.wake_event.set()
+
+    def on_moved(self, event):
+        # Files renamed or moved into the watched directory also count as arrivals.
+        if not event.is_directory:
+            self.wake_event.set()
+
+    def on_modified(self, event):
+        # Senders that create a file and then stream into it emit only modify
+        # events after the create; these must also refresh the quiescence clock
+        # so a study is never flushed while one of its files is mid-write.
+        if not event.is_directory:
+            self.wake_event.set()
+
 
 class DICOMListener:
     """
@@ -39,7 +87,8 @@ class DICOMListener:
             other_dir: Subdirectory for non-QA scans
             analysis_dir: Subdirectory with analysis flags
             sleep_interval: Seconds to wait between checks
-            wait_cycles: Number of cycles to wait after last file before processing
+            wait_cycles: Number of quiet sleep intervals required after the
+                last file activity before processing
         """
         # Store the root listener directory and the managed subdirectories beneath it.
         self.base_path = Path(base_path)
@@ -52,18 +101,111 @@ class DICOMListener:
         self.sleep_interval = sleep_interval
         self.wait_cycles = wait_cycles
         
-        # Track listener state and file-arrival stability between polling iterations.
+        # Track listener state and file-arrival stability between processing passes.
+        # A study is flushed only after `wait_cycles * sleep_interval` seconds
+        # of wall-clock quiescence (no filesystem events, no count changes), so
+        # a burst of events cannot fast-forward the stability wait.
         self.is_running = False
         self.file_count_old = 0
-        self.wait_counter = 0
         self.step_counter = 0
-        
+        self._last_activity = time.monotonic()
+        self._saw_entries = False
+
         # Hold an optional callback that external code can use for notifications.
         self.analysis_callback = None
+
+        # Filesystem events signal this event so the listener wakes immediately.
+        self._wake_event = threading.Event()
+        self._observer = None
+
+        # Names already probed and found not to be DICOM; avoids re-reading
+        # the same stale non-DICOM files on every scan.
+        self._known_nondicom = set()
+
+        # Names already confirmed to be DICOM. Arrivals are probed on every
+        # stability cycle until transfer, so remembering positives avoids
+        # re-reading each pending file's preamble several times per study.
+        self._known_dicom = set()
         
         # Ensure the managed directory tree exists before listening begins.
         self._create_directories()
     
+    @staticmethod
+    def _read_preamble(path):
+        """
+        Read the 128-byte DICOM preamble plus the 4-byte 'DICM' marker.
+
+        Uses the raw os.open/os.read pair instead of buffered open(), which
+        would allocate a full I/O buffer and trigger read-ahead for a known
+        132-byte peek. Returns the bytes read, or None when the file could
+        not be opened.
+        """
+        flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+        try:
+            fd = os.open(path, flags)
+        except OSError:
+            return None
+        try:
+            return os.read(fd, 132)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def _is_dicom_file(cls, path):
+        """
+        Check for the DICOM preamble magic without a full pydicom call.
+
+        Non-DICOM files cost a single small raw read instead of a parser
+        start-up.
+        """
+        data = cls._read_preamble(path)
+        return data is not None and data[128:132] == b'DICM'
+
+    def _probe_dicom(self, file_path, name):
+        """
+        Check whether a file is DICOM, remembering negative results.
+
+        A name found in the negative cache costs one set lookup instead of an
+        open/read/close. Negative results are only cached once the full
+        132-byte preamble could be read, so files still being written are
+        re-probed on later scans.
+        """
+        if name in self._known_dicom:
+            return True
+        if name in self._known_nondicom:
+            return False
+
+        data = self._read_preamble(file_path)
+        if data is None:
+            return False
+
+        if data[128:132] == b'DICM':
+            self._known_dicom.add(name)
+            return True
+
+        # The preamble is complete and the magic is absent: safe to remember.
+        if len(data) == 132:
+            self._known_nondicom.add(name)
+        return False
+
+    @staticmethod
+    def _read_id_dataset(path):
+        """
+        Read only the identification tags needed for patient grouping.
+
+        Uses `stop_before_pixels` and `specific_tags` so pydicom stops parsing
+        once StationName and PatientID have been seen, instead of reading the
+        whole dataset including pixel data.
+        """
+        return pydicom.dcmread(
+            path,
+            stop_before_pixels=True,
+            specific_tags=_ID_TAGS,
+            force=True
+        )
+
     def _create_directories(self):
         """Create necessary directories if they don't exist."""
         # Create each managed directory so later file operations have a stable target.
@@ -79,94 +221,178 @@ class DICOMListener:
         """
         self.analysis_callback = callback
     
+    def _is_network_path(self):
+        """Return True when the monitored directory sits on a UNC/network share."""
+        # Native filesystem event APIs are unreliable on SMB/NFS mounts, so
+        # such paths must fall back to watchdog's polling observer.
+        drive = getattr(self.new_data_path, 'drive', '')
+        return drive.startswith('\\\\') or str(self.new_data_path).startswith('\\\\')
+
+    def _create_observer(self):
+        """Create the filesystem observer appropriate for the monitored path."""
+        # Network shares do not deliver inotify/ReadDirectoryChangesW events
+        # reliably, so use the polling observer there with a relaxed timeout.
+        if self._is_network_path():
+            return PollingObserver(timeout=max(self.sleep_interval, 30))
+        return Observer()
+
     def start(self):
         """
         Start listening for DICOM files.
-        
-        Runs in a loop until stopped.
+
+        Runs in a loop until stopped. Detection is event-driven: a watchdog
+        observer wakes the loop as soon as files arrive or change, and the
+        loop only rescans the inbound directory while files are pending. A
+        study is transferred once the directory has been quiet for
+        `wait_cycles * sleep_interval` seconds of wall-clock time. This
+        removes the per-cycle directory walk during idle periods and cuts
+        detection latency to near-instant on local filesystems.
         """
         self.is_running = True
         print(f"DICOM Listener started. Monitoring: {self.new_data_path}")
         print(f"Check interval: {self.sleep_interval} seconds")
         print(f"Wait cycles: {self.wait_cycles}")
-        
-        # Poll continuously until `stop()` flips the running flag.
-        while self.is_running:
+
+        # Watch the inbound directory so arrivals wake the loop immediately.
+        self._observer = self._create_observer()
+        self._observer.schedule(
+            _NewFileEventHandler(self._wake_event),
+            str(self.new_data_path),
+            recursive=False
+        )
+        self._observer.start()
+
+        try:
+            # Run one initial sweep so files that arrived before startup are handled.
             self._check_and_process()
-            time.sleep(self.sleep_interval)
-            self.step_counter += 1
-            
-            # Emit an occasional heartbeat so long quiet periods still show activity.
-            if self.step_counter % 10 == 0:
-                print(f"Step {self.step_counter} - Monitoring...")
-    
+
+            # Wait for filesystem events until `stop()` flips the running flag.
+            while self.is_running:
+                # Wake early on new-file events; otherwise tick at the poll cadence
+                # so the arrival-stability counters keep advancing.
+                triggered = self._wake_event.wait(timeout=self.sleep_interval)
+                if triggered:
+                    self._wake_event.clear()
+                    # Any event (create, move or in-place write) restarts the
+                    # quiescence window; only event-free wall-clock time counts
+                    # toward the stability threshold.
+                    self._last_activity = time.monotonic()
+                if not self.is_running:
+                    break
+
+                self.step_counter += 1
+
+                # Rescan on event wakes, and keep rescanning on timeout ticks
+                # while the inbound directory still holds entries: files that
+                # are created once and then written in place go quiet without a
+                # further create/move event, so the timeout path must carry
+                # them to the transfer decision.
+                if triggered or self._saw_entries:
+                    self._check_and_process()
+
+                # Emit an occasional heartbeat so long quiet periods still show activity.
+                if self.step_counter % 10 == 0:
+                    print(f"Step {self.step_counter} - Monitoring...")
+        finally:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
     def stop(self):
         """Stop the listener."""
         self.is_running = False
+
+        # Wake the listener loop immediately so shutdown is not delayed by a full wait.
+        self._wake_event.set()
         print("DICOM Listener stopped.")
     
     def _check_and_process(self):
         """Check for new files and process if ready."""
         # Read the inbound directory contents; network-mounted paths may disappear temporarily.
+        # os.scandir returns the file type alongside each name, so no per-entry
+        # stat calls are needed afterwards.
         try:
-            files = os.listdir(self.new_data_path)
+            with os.scandir(self.new_data_path) as it:
+                entries = [(entry.name, entry.is_file(follow_symlinks=False)) for entry in it]
         except Exception as e:
             print(f"Path not available: {e}")
             return
-        
+
         # Collect supported incoming file types into separate lists for later handling.
         dicom_files = []
         prm_files = []
-        
-        for file in files:
+
+        # Join plain strings in the per-file loop; the pathlib layer allocates
+        # several objects per construction and every os call here accepts str.
+        new_data_str = str(self.new_data_path)
+
+        for file, is_file in entries:
+            # Every branch below only applies to regular files.
+            if not is_file:
+                continue
+
             # Build the full source path for the current inbound file candidate.
-            file_path = self.new_data_path / file
-            
+            file_path = os.path.join(new_data_str, file)
+
+            # Split the filename once instead of re-allocating per comparison.
+            parts = file.split('.')
+            head = parts[0]
+            ext = parts[-1]
+
             # Remove directory-index artifacts that should never be processed as payload data.
-            if file_path.is_file() and 'RTDIR.dir' in file:
+            if 'RTDIR.dir' in file:
                 os.remove(file_path)
                 continue
-            
+
             # Classify normal DICOM payloads and legacy CT files that may lack a `.dcm` suffix.
-            if file_path.is_file():
-                try:
-                    if pydicom.misc.is_dicom(file_path) or 'CT' in file.split('.')[0]:
-                        # Remove stale `.dir` pseudo-files while retaining actual image payloads.
-                        if 'CT' in file.split('.')[0] and file.split('.')[-1] == 'dir':
-                            os.remove(file_path)
-                        else:
-                            dicom_files.append(file)
-                except:
-                    pass
-                
-                # Preserve `.prm` profile files so they move with the same study batch.
-                if file.split('.')[-1] == 'prm':
-                    prm_files.append(file)
-        
+            try:
+                if self._probe_dicom(file_path, file) or 'CT' in head:
+                    # Remove stale `.dir` pseudo-files while retaining actual image payloads.
+                    if 'CT' in head and ext == 'dir':
+                        os.remove(file_path)
+                    else:
+                        dicom_files.append(file)
+            except:
+                pass
+
+            # Preserve `.prm` profile files so they move with the same study batch.
+            if ext == 'prm':
+                prm_files.append(file)
+        
+        # Drop cached probe results for files no longer in the directory.
+        current_names = {name for name, _ in entries}
+        self._known_nondicom.intersection_update(current_names)
+        self._known_dicom.intersection_update(current_names)
+
+        # Remember whether anything is pending so the listener loop keeps
+        # rescanning on timeout ticks until the directory drains; files still
+        # mid-write may not classify as DICOM yet but must keep the loop alive.
+        self._saw_entries = any(is_file for _, is_file in entries)
+
         # Count all pending study files to determine whether arrival has stabilized.
         total_files = len(dicom_files) + len(prm_files)
-        
+
         if total_files > 0:
             print(f"Found {len(dicom_files)} DICOM files, {len(prm_files)} PRM files")
-        
-        # Wait until the inbound file count stops growing before moving the study.
+
+        # Wait until the inbound directory has been quiet for the full
+        # stability window before moving the study.
         if total_files > 0:
-            if total_files > self.file_count_old:
-                # A larger file count means the current study is still arriving.
-                self.wait_counter = 1
+            if total_files != self.file_count_old:
+                # A changed file count means the current study is still arriving.
                 self.file_count_old = total_files
-            elif total_files == self.file_count_old:
-                # An unchanged count suggests the study may now be complete.
-                self.wait_counter += 1
-            
-            # Transfer the study once the file count has remained stable long enough.
-            if self.wait_counter >= self.wait_cycles:
+                self._last_activity = time.monotonic()
+
+            # Transfer the study once no events or count changes have been
+            # seen for `wait_cycles` sleep intervals of wall-clock time.
+            quiet_for = time.monotonic() - self._last_activity
+            if quiet_for >= self.wait_cycles * self.sleep_interval:
                 print("No new files received. Starting transfer...")
                 self._transfer_and_flag(dicom_files, prm_files)
-                
-                # Reset the stability counters before the next inbound study.
+
+                # Reset the stability state before the next inbound study.
                 self.file_count_old = 0
-                self.wait_counter = 0
+                self._last_activity = time.monotonic()
     
     def _transfer_and_flag(self, dicom_files, prm_files):
         """
@@ -181,87 +407,152 @@ class DICOMListener:
         
         # Group inbound files by patient or phantom identifier before transfer.
         file_groups = {}
-        
-        for file in dicom_files:
-            # Build the source path for the current DICOM-like payload.
-            file_path = self.new_data_path / file
-            
+
+        # Remember the identification tags read for each file so the staged
+        # study carries them in a sidecar index; consumers can then group and
+        # sort without re-parsing every header.
+        id_index = {}
+
+        # Read the identification headers through a small thread pool: each
+        # read is independent, dominated by open/read latency (worst on
+        # networked storage), and pydicom releases the GIL around the I/O.
+        new_data_str = str(self.new_data_path)
+
+        def _read_one(file):
+            try:
+                return self._read_id_dataset(os.path.join(new_data_str, file)), None
+            except Exception as e:
+                return None, e
+
+        if len(dicom_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+                header_results = list(executor.map(_read_one, dicom_files))
+        else:
+            header_results = [_read_one(file) for file in dicom_files]
+
+        for file, (ds, error) in zip(dicom_files, header_results):
+            if error is not None:
+                print(f"Error reading {file}: {error}")
+                continue
+
             try:
+                # Split the filename once for both the head and extension tests.
+                parts = file.split('.')
+
                 # Extract a grouping identifier from either legacy CT files or standard DICOM tags.
-                if 'CT' in file.split('.')[0] and not file.split('.')[-1] == 'dcm':
-                    # `ds` is the parsed DICOM dataset for a legacy-named CT image.
-                    ds = pydicom.dcmread(file_path, force=True)
+                if 'CT' in parts[0] and parts[-1] != 'dcm':
                     # `patient_id` is the normalized phantom identifier used for grouping.
                     patient_id = 'cat_' + ds.StationName
                 else:
-                    # `ds` is the parsed DICOM dataset for a normal incoming image.
-                    ds = pydicom.dcmread(file_path)
                     # `patient_id` is the study grouping key read directly from DICOM metadata.
                     patient_id = ds.PatientID
-                
-                # Create the file list for a new identifier before appending to it.
-                if patient_id not in file_groups:
-                    file_groups[patient_id] = []
-                file_groups[patient_id].append(file)
+
+                # Append to the identifier's file list, creating it on first sight.
+                file_groups.setdefault(patient_id, []).append(file)
+                id_index[file] = {
+                    'PatientID': str(getattr(ds, 'PatientID', '')),
+                    'StationName': str(getattr(ds, 'StationName', ''))
+                }
             except Exception as e:
                 print(f"Error reading {file}: {e}")
-        
+
         # Associate profile files with a synthetic identifier so they transfer with QA studies.
         for file in prm_files:
             # `patient_id` is the synthetic grouping key derived from the profile filename prefix.
             patient_id = file.split('_')[0] + 'prof'
-            if patient_id not in file_groups:
-                file_groups[patient_id] = []
-            file_groups[patient_id].append(file)
-        
+            file_groups.setdefault(patient_id, []).append(file)
+
         # Transfer each grouped study into its final destination folder.
         for patient_id, files in file_groups.items():
-            self._transfer_group(patient_id, files, timestamp)
+            self._transfer_group(patient_id, files, timestamp, id_index)
     
-    def _transfer_group(self, patient_id, files, timestamp):
+    def _transfer_group(self, patient_id, files, timestamp, id_index=None):
         """
         Transfer a group of files for one patient/phantom.
-        
+
         Args:
             patient_id: Patient or phantom ID
             files: List of files to transfer
             timestamp: Timestamp string for directory naming
+            id_index: Optional mapping of source filename to the
+                identification tags read during grouping
         """
         # Truncate and sanitize the identifier so it is safe to use in directory names.
-        patient_id_clean = patient_id[:min(20, len(patient_id))]
-        patient_id_clean = "".join(x for x in patient_id_clean if x.isalnum() or x in ['_', ' '])
-        
-        # Classify the study as QA or non-QA based on known phantom-related keywords.
-        is_qa = any(keyword in patient_id.lower() for keyword in ['mlc', 'iso', 'prof', 'cat'])
-        
+        # The compiled pattern strips disallowed characters in one C-level pass
+        # instead of a per-character isalnum() call.
+        patient_id_clean = _ID_SANITIZE_RE.sub('', patient_id[:20])
+        
+        # Classify the study as QA or non-QA based on known phantom-related keywords,
+        # lowercasing the identifier once for all keyword tests.
+        pid_lower = patient_id.lower()
+        is_qa = any(keyword in pid_lower for keyword in _QA_KEYWORDS)
+
         # Route the grouped files into the QA or non-QA tree.
-        if is_qa:
-            dest_dir = self.qa_path / f"{patient_id_clean}_{timestamp}"
-        else:
-            dest_dir = self.other_path / f"{patient_id_clean}_{timestamp}"
+        dest_root = self.qa_path if is_qa else self.other_path
+        dest_dir = dest_root / f"{patient_id_clean}_{timestamp}"
         
         dest_dir.mkdir(parents=True, exist_ok=True)
-        
+
+        # When source and destination share a filesystem, os.replace is an
+        # atomic O(1) rename; shutil.move would copy every byte and unlink.
+        try:
+            same_device = os.stat(self.new_data_path).st_dev == os.stat(dest_dir).st_dev
+        except OSError:
+            same_device = False
+
+        # Accumulate the staged-study index so the header tags read during
+        # grouping travel with the files instead of being re-parsed later.
+        index = {}
+
         # Move each file into the chosen destination, normalizing extensions where needed.
         for file in files:
-            # `src_path` is the original inbound file location.
-            src_path = self.new_data_path / file
-            
+            # `src_path` is the original inbound file location as a plain string.
+            src_path = os.path.join(str(self.new_data_path), file)
+
             # Append `.dcm` to legacy CT filenames that arrive without a medical-image suffix.
-            if file.split('.')[-1] not in ['dcm', 'prm']:
+            # rsplit with maxsplit avoids building a full per-dot list just for the suffix.
+            if file.rsplit('.', 1)[-1] not in ('dcm', 'prm'):
                 dest_file = dest_dir / (file + '.dcm')
             else:
                 dest_file = dest_dir / file
-            
+
             print(f"Transferring: {file} -> {dest_file}")
-            shutil.move(src_path, dest_file)
-        
+            if same_device:
+                try:
+                    os.replace(src_path, dest_file)
+                except OSError:
+                    shutil.move(src_path, dest_file)
+            else:
+                shutil.move(src_path, dest_file)
+
+            # Forget the probe result for the moved name immediately. Re-sent
+            # studies often reuse SOP-UID-derived filenames, and a stale cache
+            # entry would answer for a brand-new file that may still be
+            # mid-write.
+            self._known_dicom.discard(file)
+            self._known_nondicom.discard(file)
+
+            # Record the already-read tags under the destination filename.
+            if id_index and file in id_index:
+                index[dest_file.name] = id_index[file]
+
+        # Write the study's metadata index as a hidden sidecar next to the
+        # images; the load passes skip hidden files, so it is never mistaken
+        # for payload data.
+        if index:
+            try:
+                with open(dest_dir / '.catphan_index.json', 'w') as f:
+                    json.dump(index, f)
+            except OSError as e:
+                print(f"Could not write index for {dest_dir}: {e}")
+
         # Create an analysis flag only for QA studies, since those are the intended automated target.
         if is_qa:
-            # `flag_file` is the sentinel file that tells the processor a study is ready.
+            # `flag_file` is the sentinel file that tells the processor a study
+            # is ready. Its name alone identifies the staged directory, so an
+            # empty touch is enough — no content to write or read back.
             flag_file = self.analysis_path / f"{patient_id_clean}_{timestamp}"
-            with open(flag_file, 'w') as f:
-                f.write(f"{patient_id_clean}_{timestamp}")
+            flag_file.touch()
             
             print(f"Flagged for analysis: {flag_file}")
             
@@ -280,67 +571,104 @@ class DICOMProcessor:
     Works with DICOMListener to automatically analyze incoming data.
     """
     
-    def __init__(self, analyzer_class, analysis_dir):
+    def __init__(self, analyzer_class, analysis_dir, max_workers=1):
         """
         Initialize DICOM processor.
-        
+
         Args:
             analyzer_class: The CatPhanAnalyzer class (or similar)
             analysis_dir: Directory containing analysis flags
+            max_workers: Number of analyses to run concurrently; the default
+                of 1 keeps the legacy run-inline behaviour
         """
         # Store the analyzer factory used to process each flagged study.
         self.analyzer_class = analyzer_class
 
         # Store the directory that contains sentinel files waiting to be processed.
         self.analysis_dir = Path(analysis_dir)
-    
+
+        # With more than one worker, analyses run on a background pool so the
+        # flag-polling loop returns immediately instead of blocking for the
+        # full load/analyze/report cycle of each study.
+        self.max_workers = int(max_workers)
+        self._executor = (ThreadPoolExecutor(max_workers=self.max_workers)
+                          if self.max_workers > 1 else None)
+
+    def _run_analysis(self, data_path, dir_name):
+        """Run the standard analyze-and-report workflow for one staged study."""
+        print(f"\n{'='*60}")
+        print(f"Processing: {dir_name}")
+        print(f"{'='*60}\n")
+
+        # Instantiate the analyzer and run the standard reporting workflow.
+        analyzer = self.analyzer_class(data_path)
+        analyzer.open_log()
+        analyzer.analyze()
+        analyzer.generate_report()
+        analyzer.close_log()
+
+    def _run_analysis_background(self, data_path, dir_name):
+        """Worker wrapper that reports failures instead of losing them."""
+        # Exceptions raised on pool threads vanish with the dropped Future,
+        # so surface them the same way the serial path does.
+        try:
+            self._run_analysis(data_path, dir_name)
+        except Exception as e:
+            print(f"Error processing {dir_name}: {e}")
+
     def check_and_process(self):
         """
         Check for analysis flags and process any pending analyses.
-        
+
         Returns:
-            Number of analyses performed
+            Number of analyses performed (or queued, with background workers)
         """
         # Track how many queued studies were successfully processed in this pass.
         count = 0
-        
+
         # Exit early when the flag directory does not yet exist.
         if not self.analysis_dir.exists():
             return count
-        
+
         # Walk each flag file and process the corresponding staged study.
         for flag_file in self.analysis_dir.iterdir():
             if flag_file.is_file():
                 try:
-                    # Read the target study directory name from the sentinel file.
-                    with open(flag_file, 'r') as f:
-                        # `dir_name` is the staged-study folder name referenced by the flag.
-                        dir_name = f.read().strip()
-                    
+                    # The sentinel's filename is the staged-study folder name;
+                    # nothing needs to be opened or read. (Flags written by
+                    # older versions carried the same string as content.)
+                    dir_name = flag_file.name
+
                     # Resolve the staged-study directory by checking the known destination roots.
                     data_path = self._find_data_path(dir_name)
-                    
+
                     if data_path and data_path.exists():
-                        print(f"\n{'='*60}")
-                        print(f"Processing: {dir_name}")
-                        print(f"{'='*60}\n")
-                        
-                        # Instantiate the analyzer and run the standard reporting workflow.
-                        analyzer = self.analyzer_class(data_path)
-                        analyzer.open_log()
-                        analyzer.analyze()
-                        analyzer.generate_report()
-                        analyzer.close_log()
-                        
+                        if self._executor is not None:
+                            # Drop the flag before queueing so the next poll
+                            # cannot submit the same study twice.
+                            flag_file.unlink()
+                            self._executor.submit(
+                                self._run_analysis_background, data_path, dir_name
+                            )
+                            count += 1
+                            continue
+
+                        self._run_analysis(data_path, dir_name)
                         count += 1
-                    
+
                     # Remove the flag file so the same study is not processed twice.
                     flag_file.unlink()
-                    
+
                 except Exception as e:
                     print(f"Error processing {flag_file}: {e}")
-        
+
         return count
+
+    def shutdown(self):
+        """Wait for any queued background analyses to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
     
     def _find_data_path(self, dir_name):
         """
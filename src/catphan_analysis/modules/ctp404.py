@@ -24,6 +24,11 @@ class CTP404Module:
     
     # ROI angles (degrees) relative to phantom rotation
     ROI_ANGLES = [0, 30, 60, 90, 120, 180, -120, -60, -90]
+
+    # Unit-circle outline shared by every ROI overlay; scaled and translated
+    # per insert so the trig tables are built once at class definition.
+    _UC_COS = np.cos(np.linspace(0, 2*np.pi, 100))
+    _UC_SIN = np.sin(np.linspace(0, 2*np.pi, 100))
     
     def __init__(self, dicom_set, slice_index, center, rotation_offset):
         """
@@ -41,12 +46,22 @@ class CTP404Module:
         self.center = center
         self.rotation_offset = rotation_offset
 
+        # Resolve the slice geometry once up front: every pydicom attribute
+        # access walks the dataset's tag tree, and several analysis steps
+        # need these same values.
+        ds = dicom_set[slice_index]
+        self.image_size = (ds.Rows, ds.Columns)
+        self.pixel_spacing = ds.PixelSpacing
+
         # Cache intermediate images and derived results for later reporting and plotting.
         self.averaged_image = None
         self.results = []
         self.roi_coordinates = None
         self.scaling_results = None
         self.slice_thickness = None
+
+        # Cache the phantom outline computed for plotting overlays.
+        self._outer_boundary = None
         
     def prepare_image(self):
         """
@@ -62,11 +77,33 @@ class CTP404Module:
         im1 = self.dicom_set[idx].pixel_array
         im2 = self.dicom_set[idx+1].pixel_array
         im3 = self.dicom_set[idx-1].pixel_array
-        
+
+        # Accumulate in int32: the native uint16 arrays could overflow under
+        # a chained `+`, and the explicit dtype with an in-place second add
+        # leaves a single accumulator instead of two full-image temporaries.
+        acc = np.add(im1, im2, dtype=np.int32)
+        np.add(acc, im3, out=acc)
+
         # Average the three slices to reduce noise before ROI measurements.
-        self.averaged_image = (im1 + im2 + im3) / 3
+        # float32 easily covers the HU range and halves the image's memory
+        # traffic for every downstream mask and profile pass.
+        self.averaged_image = np.divide(acc, 3, dtype=np.float32)
         return self.averaged_image
-    
+
+    def update_center(self, new_center):
+        """
+        Move the module center without discarding the prepared image.
+
+        Args:
+            new_center: Tuple (x, y) of the refined center coordinates
+        """
+        # The averaged image does not depend on the center, so a refinement
+        # only needs to invalidate ROI measurements derived from the old
+        # coordinates; the expensive prepare_image() work is kept.
+        self.center = new_center
+        self.results = []
+        self.roi_coordinates = None
+
     def analyze_contrast(self):
         """
         Analyze contrast ROIs and calculate HU values.
@@ -80,10 +117,8 @@ class CTP404Module:
         # `im` is the averaged CTP404 image used for all ROI measurements.
         im = self.averaged_image
 
-        # `sz` and `space` describe the image dimensions and pixel spacing.
-        sz = (self.dicom_set[self.slice_index].Rows, 
-              self.dicom_set[self.slice_index].Columns)
-        space = self.dicom_set[self.slice_index].PixelSpacing
+        # `space` is the pixel spacing resolved once at construction time.
+        space = self.pixel_spacing
         
         # Convert the physical ROI dimensions into pixel-space distances.
         h, w = im.shape[:2]
@@ -93,29 +128,34 @@ class CTP404Module:
         # Prepare containers for numeric results and plotting outlines.
         results = []
         roi_coords = []
-        
-        for i, (angle, material) in enumerate(zip(self.ROI_ANGLES, self.MATERIALS)):
-            # `angle_rad` is the corrected ROI angle after applying phantom rotation.
-            angle_rad = np.radians(angle + self.rotation_offset)
 
-            # `cx` and `cy` are the pixel coordinates of the current ROI center.
-            cx = ring_r * np.cos(angle_rad) + self.center[0]
-            cy = ring_r * np.sin(angle_rad) + self.center[1]
-            
-            # Build the circular ROI mask centered on the current material insert.
-            mask = self._create_circular_mask(h, w, (cx, cy), r)
-            
-            # Measure the HU mean and standard deviation inside the current ROI.
-            mean_hu = np.mean(im[mask])
-            std_hu = np.std(im[mask])
-            
-            results.append([i+1, material, mean_hu, std_hu])
-            
+        # One vectorized trig evaluation yields every insert center at once,
+        # instead of nine scalar np.cos/np.sin round-trips through NumPy.
+        angles = np.radians(np.asarray(self.ROI_ANGLES, dtype=np.float64) + self.rotation_offset)
+        cxs = ring_r * np.cos(angles) + self.center[0]
+        cys = ring_r * np.sin(angles) + self.center[1]
+
+        # The outline circle is identical for every ROI up to translation, so
+        # scale the class-level unit circle once and shift it per insert.
+        outline_x = r * self._UC_COS
+        outline_y = r * self._UC_SIN
+
+        # The insert radius is only a handful of pixels, so each ROI is
+        # measured inside a local bounding box around its center rather than
+        # through full-image masks: per-ROI work drops from O(H*W) to O(r^2).
+        for i, material in enumerate(self.MATERIALS):
+            mask, (y0, y1, x0, x1) = self._create_circular_mask(
+                (h, w), (cxs[i], cys[i]), r
+            )
+            values = im[y0:y1, x0:x1][mask]
+            results.append([
+                i + 1, material,
+                values.mean(dtype=np.float64),
+                values.std(dtype=np.float64),
+            ])
+
             # Save a circular outline for plotting overlays.
-            t = np.linspace(0, 2*np.pi, 100)
-            roi_x = r * np.cos(t) + cx
-            roi_y = r * np.sin(t) + cy
-            roi_coords.append((roi_x, roi_y))
+            roi_coords.append((outline_x + cxs[i], outline_y + cys[i]))
         
         # Persist the computed ROI results for later summary/report generation.
         self.results = results
@@ -156,106 +196,99 @@ class CTP404Module:
         Returns:
             Tuple of (x_scale_cm, y_scale_cm, scaling_points)
         """
-        from scipy.interpolate import interpn
-        from scipy.signal import find_peaks
-        
-        # `idx` is the nominal CTP404 slice index used throughout this calculation.
-        idx = self.slice_index
-        
-        # Average three neighboring slices to stabilize the edge profiles.
-        im1 = self.dicom_set[idx].pixel_array
-        im2 = self.dicom_set[idx+1].pixel_array
-        im3 = self.dicom_set[idx-1].pixel_array
-        im = (im1 + im2 + im3) / 3
-        
-        # Extract the image size and pixel spacing metadata.
-        sz = (self.dicom_set[idx].Rows, self.dicom_set[idx].Columns)
-        space = self.dicom_set[idx].PixelSpacing
-        
-        # Build interpolation axes matching the image grid.
-        x = np.linspace(0, (sz[0]-1), sz[0])
-        y = np.linspace(0, (sz[1]-1), sz[1])
-        
+        from scipy.ndimage import map_coordinates
+
+        # Reuse the 3-slice average prepared for the contrast analysis; it is
+        # the same image this calculation used to rebuild from pixel_array.
+        if self.averaged_image is None:
+            self.prepare_image()
+        im = self.averaged_image
+
+        # Pixel spacing was resolved once at construction time.
+        space = self.pixel_spacing
+
         # `cmid` is the midpoint between the top and bottom air-ROI centers.
         cmid = [(ct_point[0] + cb_point[0])/2, (ct_point[1] + cb_point[1])/2]
         
         # Build the first profile path through the opposing air inserts.
+        # Evaluate the trig terms once per direction; the path endpoints are
+        # just the midpoint offset by (+/-dx, +/-dy).
         r = 70  # Radius of circle passing through ROI centers
-        t_offset = self.rotation_offset
-        
-        xscale_xcoord = [cmid[0] - r/space[0]*np.cos(t_offset*2*np.pi/360),
-                        cmid[0] + r/space[0]*np.cos(t_offset*2*np.pi/360)]
-        xscale_ycoord = [cmid[1] - r/space[0]*np.sin(t_offset*2*np.pi/360),
-                        cmid[1] + r/space[0]*np.sin(t_offset*2*np.pi/360)]
+        r_px = r / space[0]
+
+        ang = np.radians(self.rotation_offset)
+        dx = r_px * np.cos(ang)
+        dy = r_px * np.sin(ang)
+        xscale_xcoord = [cmid[0] - dx, cmid[0] + dx]
+        xscale_ycoord = [cmid[1] - dy, cmid[1] + dy]
 
         # `l` is the total profile-path length in pixel units.
-        l = np.sqrt((xscale_xcoord[1]-xscale_xcoord[0])**2 + 
-                   (xscale_ycoord[1]-xscale_ycoord[0])**2)
+        l = 2 * np.hypot(dx, dy)
         
         # Sample the first profile between the opposing air-ROI centers.
         n = 150
         xtmp = np.linspace(xscale_xcoord[0], xscale_xcoord[1], n)
         ytmp = np.linspace(xscale_ycoord[0], xscale_ycoord[1], n)
         ltmp = np.linspace(0, l, n)
-        ftmp = np.zeros(len(xtmp))
-        
-        # Interpolate the image along the first scaling profile.
-        for i in range(len(xtmp)):
-            ftmp[i] = interpn((x, y), im, [ytmp[i], xtmp[i]])
-        
-        f1 = ftmp
+
+        # Interpolate the image along the first scaling profile. One bilinear
+        # map_coordinates call samples every point at once instead of paying
+        # interpn's per-call validation 150 times.
+        f1 = map_coordinates(im, np.vstack([ytmp, xtmp]), order=1, prefilter=False)
         pts = [xtmp, ytmp]
         
         # Repeat the same process in the perpendicular direction for the second scaling axis.
-        t_offset = t_offset + 90
-        xscale_xcoord = [cmid[0] - r/space[0]*np.cos(t_offset*2*np.pi/360),
-                        cmid[0] + r/space[0]*np.cos(t_offset*2*np.pi/360)]
-        xscale_ycoord = [cmid[1] - r/space[0]*np.sin(t_offset*2*np.pi/360),
-                        cmid[1] + r/space[0]*np.sin(t_offset*2*np.pi/360)]
-        
+        ang = np.radians(self.rotation_offset + 90)
+        dx = r_px * np.cos(ang)
+        dy = r_px * np.sin(ang)
+        xscale_xcoord = [cmid[0] - dx, cmid[0] + dx]
+        xscale_ycoord = [cmid[1] - dy, cmid[1] + dy]
+
+
         xtmp = np.linspace(xscale_xcoord[0], xscale_xcoord[1], n)
         ytmp = np.linspace(xscale_ycoord[0], xscale_ycoord[1], n)
-        ftmp = np.zeros(len(xtmp))
-        
+
         # Interpolate the image along the second scaling profile.
-        for i in range(len(xtmp)):
-            ftmp[i] = interpn((x, y), im, [ytmp[i], xtmp[i]])
-        
-        f2 = ftmp
+        f2 = map_coordinates(im, np.vstack([ytmp, xtmp]), order=1, prefilter=False)
         pts.extend([xtmp, ytmp])
         
         # Differentiate the profiles so edge transitions appear as peaks.
         df1 = np.diff(f1)
         df2 = np.diff(f2)
         
-        # Search for enough edge peaks, relaxing the threshold when necessary.
+        # Locate every rising and falling edge once at the lowest threshold;
+        # find_peaks never raises on sparse peaks (it returns an empty array),
+        # and the peak set at a higher threshold is simply the subset whose
+        # prominence-free peak heights clear it. So detect once, then relax
+        # the threshold by filtering instead of re-running find_peaks.
+        all_peaks1, heights1 = self._signed_peaks(df1)
+        all_peaks2, heights2 = self._signed_peaks(df2)
+
         peaks1 = None
         peaks2 = None
-        
+
         for h in [40, 30, 20, 10, 5]:
-            try:
-                peaks_max1, _ = find_peaks(df1, height=h)
-                peaks_min1, _ = find_peaks(-df1, height=h)
-                peaks_max2, _ = find_peaks(df2, height=h)
-                peaks_min2, _ = find_peaks(-df2, height=h)
-                
-                peaks1 = np.hstack((peaks_max1, peaks_min1))
-                peaks1 = np.array(sorted(peaks1))
-                peaks2 = np.hstack((peaks_max2, peaks_min2))
-                peaks2 = np.array(sorted(peaks2))
-                
-                # Stop once both directions have enough peaks for edge-to-edge measurements.
-                if len(peaks1) >= 2 and len(peaks2) >= 2:
-                    break
-            except:
-                continue
-        
+            cand1 = all_peaks1[heights1 >= h]
+            cand2 = all_peaks2[heights2 >= h]
+
+            # Stop once both directions have enough peaks for edge-to-edge measurements.
+            if len(cand1) >= 2 and len(cand2) >= 2:
+                peaks1 = cand1
+                peaks2 = cand2
+                break
+
+        # Fall back to the full low-threshold sets so the error path below
+        # reports the same counts the legacy loop ended with.
+        if peaks1 is None:
+            peaks1 = all_peaks1
+            peaks2 = all_peaks2
+
         # Fail with detailed diagnostics if the scaling profiles never produced usable edges.
-        if peaks1 is None or len(peaks1) < 2 or len(peaks2) < 2:
+        if len(peaks1) < 2 or len(peaks2) < 2:
             raise ValueError(
                 f"Could not find enough peaks for spatial scaling calculation. "
-                f"Found {len(peaks1) if peaks1 is not None else 0} peaks in direction 1, "
-                f"{len(peaks2) if peaks2 is not None else 0} peaks in direction 2. "
+                f"Found {len(peaks1)} peaks in direction 1, "
+                f"{len(peaks2)} peaks in direction 2. "
                 f"Derivative ranges: df1=[{df1.min():.1f}, {df1.max():.1f}], "
                 f"df2=[{df2.min():.1f}, {df2.max():.1f}]"
             )
@@ -290,7 +323,7 @@ class CTP404Module:
         
         # Use the original slice, not the averaged image, to match the legacy ramp method.
         im = self.dicom_set[self.slice_index].pixel_array
-        space = self.dicom_set[self.slice_index].PixelSpacing
+        space = self.pixel_spacing
         
         # Delegate the wire-ramp thickness calculation to the shared geometry helper.
         thickness = CatPhanGeometry.calculate_slice_thickness(im, space, self.center)
@@ -318,36 +351,59 @@ class CTP404Module:
             'slice_thickness_mm': thickness
         }
     
-    def _create_circular_mask(self, h, w, center, radius):
+    @staticmethod
+    def _signed_peaks(df, min_height=5):
         """
-        Create a circular boolean mask.
-        
+        Find rising and falling peaks of a derivative profile in one pass.
+
         Args:
-            h: Image height
-            w: Image width
+            df: 1D derivative array
+            min_height: Lowest peak height of interest
+
+        Returns:
+            Tuple of (peak indices sorted by position, matching |peak| heights)
+        """
+        from scipy.signal import find_peaks
+
+        # Detect maxima of the profile and of its negation at the lowest
+        # threshold; callers filter the returned heights to emulate stricter
+        # thresholds without re-running the detection.
+        peaks_max, props_max = find_peaks(df, height=min_height)
+        peaks_min, props_min = find_peaks(-df, height=min_height)
+
+        peaks = np.concatenate((peaks_max, peaks_min))
+        heights = np.concatenate((props_max['peak_heights'], props_min['peak_heights']))
+
+        # Keep the merged peaks in profile order, heights alongside.
+        order = np.argsort(peaks)
+        return peaks[order], heights[order]
+
+    def _create_circular_mask(self, shape, center, radius):
+        """
+        Create a circular boolean mask restricted to the ROI's bounding box.
+
+        Args:
+            shape: Image shape tuple (rows, cols)
             center: Tuple (x, y) of circle center
             radius: Circle radius in pixels
-            
+
         Returns:
-            Boolean array mask
+            Tuple of (local boolean mask, (y0, y1, x0, x1) bounding box)
+            where the mask applies to the image slice im[y0:y1, x0:x1]
         """
-        # Default the center to the image midpoint if no explicit location is provided.
-        if center is None:
-            center = (int(w/2), int(h/2))
+        h, w = shape
 
-        # Default the radius to the largest in-bounds circle when none is specified.
-        if radius is None:
-            radius = min(center[0], center[1], w-center[0], h-center[1])
-        
-        # Build broadcast-friendly coordinate grids for distance calculation.
-        Y, X = np.ogrid[:h, :w]
+        # Clamp the one-pixel-padded bounding box to the image extent.
+        x0 = max(int(center[0] - radius) - 1, 0)
+        x1 = min(int(center[0] + radius) + 2, w)
+        y0 = max(int(center[1] - radius) - 1, 0)
+        y1 = min(int(center[1] + radius) + 2, h)
 
-        # Compute the distance from each pixel to the requested circular center.
-        dist_from_center = np.sqrt((X - center[0])**2 + (Y - center[1])**2)
-        
-        # Mark pixels inside the requested radius as part of the ROI.
-        mask = dist_from_center <= radius
-        return mask
+        # Compare squared distances over the small local grid so no sqrt
+        # (or full-image pass) is needed.
+        Y, X = np.ogrid[y0:y1, x0:x1]
+        mask = (X - center[0])**2 + (Y - center[1])**2 <= radius * radius
+        return mask, (y0, y1, x0, x1)
     
     def get_plot_data(self):
         """
@@ -362,10 +418,13 @@ class CTP404Module:
         if not self.results:
             raise ValueError("Analysis must be run before getting plot data")
         
-        # Recompute the phantom boundary so plotting overlays can show the module outline.
-        geometry = CatPhanGeometry()
-        _, outer_boundary = geometry.find_center(self.averaged_image)
-        
+        # Compute the phantom boundary once; repeated plot-data requests
+        # (legacy plots plus report generation) reuse the cached outline.
+        if self._outer_boundary is None:
+            geometry = CatPhanGeometry()
+            _, self._outer_boundary = geometry.find_center(self.averaged_image)
+        outer_boundary = self._outer_boundary
+
         # `pts` contains the stored scaling profiles when spatial scaling has been computed.
         pts = self.scaling_points if self.scaling_points else [[], [], [], []]
         
@@ -37,11 +37,21 @@ class CTP486Module:
         self.roi_box_size = roi_box_size
         self.roi_offset = roi_offset
 
+        # Resolve the slice geometry once up front: every pydicom attribute
+        # access walks the dataset's tag tree, and the uniformity analysis
+        # needs these same values on every call.
+        ds = dicom_set[slice_index]
+        self.image_size = (ds.Rows, ds.Columns)
+        self.pixel_spacing = ds.PixelSpacing
+
         # Cache the averaged image and derived ROI/uniformity results.
         self.averaged_image = None
         self.results = []
         self.roi_coordinates = None
         self.uniformity_percent = None
+
+        # Cache the phantom outline computed for plotting overlays.
+        self._outer_boundary = None
         
     def prepare_image(self):
         """
@@ -57,9 +67,15 @@ class CTP486Module:
         im1 = self.dicom_set[idx].pixel_array
         im2 = self.dicom_set[idx+1].pixel_array
         im3 = self.dicom_set[idx-1].pixel_array
-        
+
+        # Accumulate in int32: the native uint16 arrays could overflow under
+        # a chained `+`, and the explicit dtype with an in-place second add
+        # leaves a single accumulator instead of two full-image temporaries.
+        acc = np.add(im1, im2, dtype=np.int32)
+        np.add(acc, im3, out=acc)
+
         # Average the slices to reduce noise before uniformity measurements.
-        self.averaged_image = (im1 + im2 + im3) / 3
+        self.averaged_image = np.divide(acc, 3, dtype=np.float32)
         return self.averaged_image
     
     def analyze_uniformity(self):
@@ -75,94 +91,58 @@ class CTP486Module:
         # `im` is the averaged image used for all uniformity ROI statistics.
         im = self.averaged_image
 
-        # `sz` and `space` describe the image dimensions and pixel spacing.
-        sz = (self.dicom_set[self.slice_index].Rows,
-              self.dicom_set[self.slice_index].Columns)
-        space = self.dicom_set[self.slice_index].PixelSpacing
+        # `sz` and `space` were resolved once at construction time.
+        sz = self.image_size
+        space = self.pixel_spacing
         
         # Convert the ROI size and offset from millimeters into pixels.
         roi_sz = self.roi_box_size / space[0]
         roi_off = self.roi_offset / space[0]
         outer_c = self.center
-        
-        # Prepare containers for each ROI mask, numeric data, and plotting coordinates.
-        masks = {}
-        roi_data = {}
-        roi_coords = []  # Store box coordinates as we create them
-        half_sz = int(roi_sz / 2)
-        
-        # Create and record the central ROI.
-        mc = self._create_box_mask(sz, outer_c[0], outer_c[1], roi_sz)
-        roi_data['centre'] = im[mc == 1]
-        masks['centre'] = mc
-        roi_coords.append([
-            int(outer_c[0]) - half_sz,
-            int(outer_c[0]) + half_sz,
-            int(outer_c[1]) - half_sz,
-            int(outer_c[1]) + half_sz
-        ])
-        
-        # Create and record the north ROI.
-        mn = self._create_box_mask(sz, outer_c[0], outer_c[1] - roi_off, roi_sz)
-        roi_data['north'] = im[mn == 1]
-        masks['north'] = mn
-        roi_coords.append([
-            int(outer_c[0]) - half_sz,
-            int(outer_c[0]) + half_sz,
-            int(outer_c[1] - roi_off) - half_sz,
-            int(outer_c[1] - roi_off) + half_sz
-        ])
-        
-        # Create and record the south ROI.
-        ms = self._create_box_mask(sz, outer_c[0], outer_c[1] + roi_off, roi_sz)
-        roi_data['south'] = im[ms == 1]
-        masks['south'] = ms
-        roi_coords.append([
-            int(outer_c[0]) - half_sz,
-            int(outer_c[0]) + half_sz,
-            int(outer_c[1] + roi_off) - half_sz,
-            int(outer_c[1] + roi_off) + half_sz
-        ])
-        
-        # Create and record the east ROI.
-        me = self._create_box_mask(sz, outer_c[0] + roi_off, outer_c[1], roi_sz)
-        roi_data['east'] = im[me == 1]
-        masks['east'] = me
-        roi_coords.append([
-            int(outer_c[0] + roi_off) - half_sz,
-            int(outer_c[0] + roi_off) + half_sz,
-            int(outer_c[1]) - half_sz,
-            int(outer_c[1]) + half_sz
-        ])
-        
-        # Create and record the west ROI.
-        mw = self._create_box_mask(sz, outer_c[0] - roi_off, outer_c[1], roi_sz)
-        roi_data['west'] = im[mw == 1]
-        masks['west'] = mw
-        roi_coords.append([
-            int(outer_c[0] - roi_off) - half_sz,
-            int(outer_c[0] - roi_off) + half_sz,
-            int(outer_c[1]) - half_sz,
-            int(outer_c[1]) + half_sz
-        ])
-        
-        # Calculate the mean and standard deviation for each named ROI.
+
+        # ROI centers for each named region, offset from the module center.
+        centers = [
+            (outer_c[0], outer_c[1]),             # centre
+            (outer_c[0], outer_c[1] - roi_off),   # north
+            (outer_c[0], outer_c[1] + roi_off),   # south
+            (outer_c[0] + roi_off, outer_c[1]),   # east
+            (outer_c[0] - roi_off, outer_c[1]),   # west
+        ]
+
+        # Prepare containers for the numeric results and plotting coordinates.
         results = []
         means = []
-        
-        for region in self.REGIONS:
-            mean_val = np.mean(roi_data[region])
-            std_val = np.std(roi_data[region])
+        roi_coords = []  # Store box coordinates as we create them
+        half_sz = int(roi_sz / 2)
+
+        # `m_total` combines the ROI footprints so callers can visualize all
+        # measured regions together.
+        m_total = np.zeros(sz, dtype=bool)
+
+        # The ROIs are axis-aligned squares, so a direct image slice yields
+        # exactly the pixels a box mask would select — no full-image float
+        # masks and no boolean gathers, just contiguous patch views.
+        for region, (cx, cy) in zip(self.REGIONS, centers):
+            x_start, x_end, y_start, y_end = self._box_bounds(sz, cx, cy, roi_sz)
+            patch = im[y_start:y_end, x_start:x_end]
+            m_total[y_start:y_end, x_start:x_end] = True
+
+            mean_val = patch.mean(dtype=np.float64)
+            std_val = patch.std(dtype=np.float64)
             results.append([region, mean_val, std_val])
             means.append(mean_val)
-        
+
+            roi_coords.append([
+                int(cx) - half_sz,
+                int(cx) + half_sz,
+                int(cy) - half_sz,
+                int(cy) + half_sz
+            ])
+
         # Express uniformity as the percent spread between the highest and lowest mean HU.
         uniformity = (np.max(means) - np.min(means)) / np.max(means) * 100
         results.append(['Uniformity', uniformity, None])
         
-        # Combine the ROI masks so callers can visualize all measured regions together.
-        m_total = mc + mn + ms + me + mw
-        
         # Persist the results for later reporting and plotting.
         self.results = results
         self.roi_coordinates = roi_coords
@@ -170,37 +150,34 @@ class CTP486Module:
         
         return results, m_total, roi_coords
     
-    def _create_box_mask(self, sz, cx, cy, roi_sz):
+    @staticmethod
+    def _box_bounds(sz, cx, cy, roi_sz):
         """
-        Create a square box mask.
-        
+        Compute the clamped slice bounds of a square ROI.
+
         Args:
             sz: Image size tuple (rows, cols)
             cx: Center x coordinate
             cy: Center y coordinate
             roi_sz: Size of box in pixels
-            
+
         Returns:
-            Boolean mask array
+            Tuple (x_start, x_end, y_start, y_end) suitable for slicing
+            the image as im[y_start:y_end, x_start:x_end]
         """
-        # Start with an empty mask covering the full image extent.
-        mask = np.zeros(sz)
-
         # Compute the raw bounding coordinates of the square ROI.
         x_start = int(cx - roi_sz/2)
         x_end = int(cx + roi_sz/2)
         y_start = int(cy - roi_sz/2)
         y_end = int(cy + roi_sz/2)
-        
+
         # Clamp the ROI bounds so they remain within the image array.
         x_start = max(0, x_start)
         x_end = min(sz[0], x_end)
         y_start = max(0, y_start)
         y_end = min(sz[1], y_end)
-        
-        # Fill the ROI using NumPy's `[row, col]` indexing convention.
-        mask[y_start:y_end, x_start:x_end] = 1
-        return mask
+
+        return x_start, x_end, y_start, y_end
     
     def analyze(self):
         """
@@ -230,10 +207,13 @@ class CTP486Module:
         if not self.results:
             raise ValueError("Analysis must be run before getting plot data")
         
-        # Recompute the phantom boundary so plot overlays can show the module outline.
-        geometry = CatPhanGeometry()
-        _, outer_boundary = geometry.find_center(self.averaged_image)
-        
+        # Compute the phantom boundary once; repeated plot-data requests
+        # (legacy plots plus report generation) reuse the cached outline.
+        if self._outer_boundary is None:
+            geometry = CatPhanGeometry()
+            _, self._outer_boundary = geometry.find_center(self.averaged_image)
+        outer_boundary = self._outer_boundary
+
         return {
             'roi_boxes': self.roi_coordinates,
             'outer_boundary': outer_boundary
@@ -5,7 +5,7 @@ Provides functions for finding phantom centers, rotations, and geometric measure
 """
 
 import numpy as np
-from scipy.interpolate import interpn
+from scipy.ndimage import map_coordinates
 from scipy.signal import find_peaks, peak_widths
 
 
@@ -38,20 +38,30 @@ class CatPhanGeometry:
         
         # `offset` nudges the detected edges slightly inward to stabilize the estimate.
         offset = 1
-        
-        try:
-            # Find the first and last pixels above threshold along each center profile.
-            x1 = next(x for x, val in enumerate(px) if val > threshold) + offset
-            y1 = next(x for x, val in enumerate(py) if val > threshold) - offset
-            x2 = next(x for x, val in reversed(list(enumerate(px))) if val > threshold) + offset
-            y2 = next(x for x, val in reversed(list(enumerate(py))) if val > threshold) - offset
-        except:
+
+        # Find the first and last above-threshold pixels on each profile with
+        # boolean argmax scans (argmax on the reversed view finds the last
+        # crossing) instead of Python generator passes that materialized a
+        # full enumerate list just to iterate backward.
+        mask_x = px > threshold
+        mask_y = py > threshold
+
+        if not (mask_x.any() and mask_y.any()):
             # Retry with a lower threshold when the default edge search is too strict.
             threshold = 300
-            x1 = next(x for x, val in enumerate(px) if val > threshold) + offset
-            y1 = next(x for x, val in enumerate(py) if val > threshold) - offset
-            x2 = next(x for x, val in reversed(list(enumerate(px))) if val > threshold) + offset
-            y2 = next(x for x, val in reversed(list(enumerate(py))) if val > threshold) - offset
+            mask_x = px > threshold
+            mask_y = py > threshold
+
+            if not (mask_x.any() and mask_y.any()):
+                raise ValueError(
+                    f"Could not detect phantom edges: no pixels above "
+                    f"threshold {threshold} on the central profiles"
+                )
+
+        x1 = int(mask_x.argmax()) + offset
+        y1 = int(mask_y.argmax()) - offset
+        x2 = int(len(px) - 1 - mask_x[::-1].argmax()) + offset
+        y2 = int(len(py) - 1 - mask_y[::-1].argmax()) - offset
         
         # `szx` and `szy` are the detected phantom diameters in the two sampled directions.
         szx = x2 - x1
@@ -89,25 +99,6 @@ class CatPhanGeometry:
         Returns:
             Index of the CTP528 slice
         """
-        def get_lp_profile(x, y, lpx, lpy, img):
-            """Get profile across line pair region."""
-            # `x1` is the evenly sampled x-coordinate path across one line-pair sector.
-            x1 = np.linspace(lpx[0], lpx[1], 50)
-
-            # `y1` is the evenly sampled y-coordinate path across one line-pair sector.
-            y1 = np.linspace(lpy[0], lpy[1], 50)
-
-            # `f1` will store the interpolated profile values across the sampled path.
-            f1 = np.zeros(len(x1))
-            
-            # Interpolate the image intensity at each point along the path.
-            for i in range(len(x1)):
-                f1[i] = interpn((x, y), img, [y1[i], x1[i]])
-            
-            # `df1` is the first derivative used to count line-pair edge transitions.
-            df1 = np.diff(f1)
-            return f1, df1
-        
         # Use an early slice to establish image size and pixel spacing information.
         idx_tmp = min(10, len(dicom_set) - 1)
         sz = (dicom_set[idx_tmp].Rows, dicom_set[idx_tmp].Columns)
@@ -118,11 +109,7 @@ class CatPhanGeometry:
         
         # Estimate the phantom center on the initial search slice.
         outer_c, _ = CatPhanGeometry.find_center(dicom_set[z_tmp].pixel_array)
-        
-        # Build the image coordinate axes in pixel units for interpolation.
-        x = np.linspace(0, (sz[0]-1), sz[0])
-        y = np.linspace(0, (sz[1]-1), sz[1])
-        
+
         # `lp_r` is the radial distance from center to the line-pair sampling arc.
         lp_r = 48  # radius in pixels
         
@@ -138,49 +125,54 @@ class CatPhanGeometry:
         # Thresholds tuned to identify the characteristic number of derivative transitions.
         thres1 = 100  # Derivative threshold
         thres2 = 50   # Count threshold
-        
+
+        # The sampling arc does not vary per slice, so build every sector's
+        # 50-point segment once; each candidate slice is then probed with a
+        # single bilinear call instead of one interpn dispatch per point.
+        seg_x = np.linspace(lpx[:-1], lpx[1:], 50, axis=1)
+        seg_y = np.linspace(lpy[:-1], lpy[1:], 50, axis=1)
+
+        # Keep only sectors whose samples stay on the image grid; the legacy
+        # per-point interpn raised for out-of-bounds samples and those
+        # sectors were skipped on every slice.
+        in_bounds = (
+            (seg_y >= 0).all(axis=1) & (seg_y <= sz[0] - 1).all(axis=1) &
+            (seg_x >= 0).all(axis=1) & (seg_x <= sz[1] - 1).all(axis=1)
+        )
+        coords = np.vstack([seg_y[in_bounds].ravel(), seg_x[in_bounds].ravel()])
+
+        def lp_edge_count(img):
+            """Count strong derivative transitions across the line-pair arc."""
+            # float32 samples are lossless for 16-bit CT data and halve the
+            # profile bandwidth of the diff/threshold pass.
+            prof = map_coordinates(img, coords, output=np.float32, order=1,
+                                   prefilter=False).reshape(-1, 50)
+            return np.sum(np.abs(np.diff(prof, axis=1)) > thres1)
+
         # Search the expected neighborhood first before falling back to the whole volume.
         search_order = [z_tmp, z_tmp+1, z_tmp-1, z_tmp+2, z_tmp-2]
-        
+
         print('Searching for CTP528 module starting at expected slices')
         for i in search_order:
             if i < 0 or i >= len(dicom_set) - 1:
                 continue
-                
+
             print(f'Slice {i+1}')
-            
-            # Accumulate derivative responses across all line-pair sectors on this slice.
-            tmpdf2 = np.array([])
-            for j in range(len(theta)-1):
-                _, tmpdf = get_lp_profile(x, y, (lpx[j], lpx[j+1]), 
-                                         (lpy[j], lpy[j+1]), 
-                                         dicom_set[i].pixel_array)
-                tmpdf2 = np.hstack((tmpdf2, tmpdf)) if tmpdf2.size else tmpdf
-            
+
             # Accept the slice once the derivative response matches the expected signature.
-            if np.sum(abs(tmpdf2) > thres1) > thres2:
+            if lp_edge_count(dicom_set[i].pixel_array) > thres2:
                 print(f'CTP528 module located: Slice {i+1}')
                 return i
-        
+
         # Fall back to a full-volume search when the local neighborhood search fails.
         print('--- Parsing through each slice to find module CTP528 ---')
         for i in range(len(dicom_set) - 1):
             print(f'Slice {i+1}')
-            
-            tmpdf2 = np.array([])
-            for j in range(len(theta)-1):
-                try:
-                    _, tmpdf = get_lp_profile(x, y, (lpx[j], lpx[j+1]), 
-                                             (lpy[j], lpy[j+1]), 
-                                             dicom_set[i].pixel_array)
-                    tmpdf2 = np.hstack((tmpdf2, tmpdf)) if tmpdf2.size else tmpdf
-                except:
-                    continue
-            
-            if np.sum(abs(tmpdf2) > thres1) > thres2:
+
+            if lp_edge_count(dicom_set[i].pixel_array) > thres2:
                 print(f'CTP528 module located: Slice {i+1}')
                 return i
-        
+
         print('Error: Cannot locate CTP528 module')
         return z_tmp  # Return expected slice as fallback
     
@@ -245,13 +237,6 @@ class CatPhanGeometry:
         # `ds` is a short alias for the ordered DICOM dataset list.
         ds = dicom_set
         
-        # Extract the five-slice neighborhood around the target module location.
-        img_zm2 = ds[z-2].pixel_array
-        img_zm1 = ds[z-1].pixel_array
-        img_z = ds[z].pixel_array
-        img_zp1 = ds[z+1].pixel_array
-        img_zp2 = ds[z+2].pixel_array
-        
         # `sz`, `space`, and `c` define the image dimensions, spacing, and midpoint.
         sz = (ds[z].Rows, ds[z].Columns)
         space = ds[z].PixelSpacing
@@ -263,21 +248,23 @@ class CatPhanGeometry:
         lp_b = lp_r/space[0]*np.cos(tfine) + c[0]
         lp_a = lp_r/space[1]*np.sin(tfine) + c[1]
         
-        # Build interpolation axes for the native image grid.
-        x = np.linspace(0, (sz[0]-1)/2, sz[0])
-        y = np.linspace(0, (sz[1]-1)/2, sz[1])
-        
-        # Collect the five neighboring images and prepare to sample each one along the arc.
-        images = [img_zm2, img_zm1, img_z, img_zp1, img_zp2]
-        profiles = []
-        
-        # Sample each candidate slice along the line-pair arc.
-        for im in images:
-            # `f` is the sampled intensity profile for the current candidate slice.
-            f = np.zeros(len(lp_a))
-            for i in range(len(lp_a)):
-                f[i] = interpn((x, y), im, [lp_a[i]*space[0], lp_b[i]*space[1]])
-            profiles.append(f)
+        # The legacy interpolation axes spanned 0..(sz-1)/2 over sz points;
+        # dividing the physical query coordinates by that grid step converts
+        # them into the fractional pixel indices map_coordinates expects.
+        step_x = (sz[0] - 1) / 2 / (sz[0] - 1)
+        step_y = (sz[1] - 1) / 2 / (sz[1] - 1)
+        coords = np.vstack([lp_a * space[0] / step_x, lp_b * space[1] / step_y])
+
+        # Score the five-slice neighborhood one slice at a time, each sampled
+        # along the arc with a single bilinear call. Only the slice being
+        # scored is referenced here; the accumulation pass below touches just
+        # the selected indices (pydicom caches each decoded array on its
+        # dataset, so they are not decoded twice).
+        profiles = [
+            map_coordinates(ds[z + k].pixel_array, coords,
+                            output=np.float32, order=1, prefilter=False)
+            for k in range(-2, 3)
+        ]
         
         # `means` stores the average profile intensity for each candidate slice.
         means = [np.mean(f) for f in profiles]
@@ -285,32 +272,28 @@ class CatPhanGeometry:
         # `tmp` is the index of the candidate slice with the strongest average signal.
         tmp   = np.argmax(means)
         
-        # Mark the three-slice window centered on the strongest candidate when possible.
-        idx = np.zeros(5)
-        try:
-            idx[tmp-1] = 1
-            idx[tmp] = 1
-            idx[tmp+1] = 1
-        except:
-            # Handle edge cases where the best candidate lies at the edge of the search window.
-            if tmp == 0:
-                idx = [1, 1, 0, 0, 0]
-            elif tmp == 4:
-                idx = [0, 0, 0, 1, 1]
-            else:
-                return img_z, means, 0
-        
-        # Accumulate the selected slices and record their offsets from the center slice.
-        im = np.zeros(sz)
+        # Mark the three-slice window centered on the strongest candidate,
+        # clamped to the search window. Clipping replaces the legacy
+        # try/except control flow, whose negative-index wraparound silently
+        # included the far z+2 slice whenever the best candidate came first.
+        idx = np.zeros(5, dtype=bool)
+        idx[max(tmp - 1, 0):min(tmp + 2, 5)] = True
+
+        # Accumulate the selected slices and record their offsets from the
+        # center slice. float32 easily covers the averaged HU range and
+        # halves the memory traffic of every downstream sampling pass.
+        im = np.zeros(sz, dtype=np.float32)
         z_mean = []
-        
+
         for i, include in enumerate(idx):
             if include:
-                im += images[i]
+                im += ds[z + i - 2].pixel_array
                 z_mean.append(i - 2)
-        
-        # Normalize the summed image and compute the mean slice offset that was selected.
-        im = im / sum(idx)
+
+        # Normalize the summed image and compute the mean slice offset that
+        # was selected. The in-place divide keeps the float32 accumulator's
+        # dtype (a plain `/` by the integer count would promote to float64).
+        im /= idx.sum()
         z_mean = np.mean(z_mean)
         
         return im, means, z_mean
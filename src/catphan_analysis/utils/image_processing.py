@@ -87,11 +87,14 @@ class ImageProcessor:
         Returns:
             Averaged image array
         """
-        # Extract the pixel arrays for the requested slice indices.
-        images = [dicom_set[idx].pixel_array for idx in indices]
+        # Stack the requested slices into one contiguous (N, H, W) float32 array
+        # so the reduction below runs as a single vectorized pass.
+        stack = np.stack([dicom_set[idx].pixel_array for idx in indices]).astype(
+            np.float32, copy=False
+        )
 
         # Return the element-wise mean image across the selected slices.
-        return np.mean(images, axis=0)
+        return stack.mean(axis=0, dtype=np.float32)
     
     @staticmethod
     def apply_window_level(image, window, level):